@@ -0,0 +1,79 @@
+# Memory used per connection by the model classes, with (current) and without __slots__.
+# Builds the same synthetic network twice, once with Connection and once with a plain-dataclass copy of it,
+# and reports the bytes allocated per connection for the connection objects alone and for the whole network.
+#
+#   python bench_memory.py                      (1,000,000 connections)
+#   python bench_memory.py --connections 200000 --cities 500
+import argparse
+import gc
+import random
+import tracemalloc
+from dataclasses import MISSING, field, fields, make_dataclass
+
+from EURailNetwork.models import Connection
+from EURailNetwork.registries import RailNetwork
+from EURailNetwork.schema import ALL_DAYS
+
+# same fields and properties as Connection but with a per-instance __dict__, i.e. the model before slots=True
+DictConnection = make_dataclass(
+    "DictConnection",
+    [(f.name, f.type) if f.default is MISSING else (f.name, f.type, field(default=f.default)) for f in fields(Connection)],
+    namespace={name: getattr(Connection, name) for name in ("dep_time", "arr_time", "day_offset", "days")},
+)
+
+TRAINS = ["TGV", "ICE", "InterCity", "RegioExpress", "Nightjet", "Frecciarossa", "Eurostar", "TER"]
+
+
+def build(cls, n_connections: int, n_cities: int, seed: int = 0) -> tuple[int, int]:
+    rng = random.Random(seed)
+    net = RailNetwork()
+    cities = [net.cities.get_or_create(f"City {i}") for i in range(n_cities)]
+    trains = [net.trains.get_or_create(name) for name in TRAINS]
+    gc.collect()
+
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    conns = []
+    for i in range(n_connections):
+        dep, arr = rng.sample(cities, 2)
+        dep_min = rng.randrange(24 * 60)
+        trip = rng.randrange(30, 600)
+        arr_min = (dep_min + trip) % (24 * 60)
+        conns.append(cls(
+            route_id=f"R{i:07d}",
+            dep_city=dep,
+            arr_city=arr,
+            dep_min=dep_min,
+            arr_min=arr_min,
+            days_mask=rng.randrange(1, ALL_DAYS + 1),
+            first_class_eur=rng.randrange(40, 300),
+            second_class_eur=rng.randrange(20, 150),
+            train=rng.choice(trains),
+            trip_minutes=trip,
+        ))
+    objects = tracemalloc.get_traced_memory()[0] - start
+    for c in conns:
+        net.add_connection(c)
+    network = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    return objects, network
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bytes per connection with and without __slots__")
+    parser.add_argument("--connections", type=int, default=1_000_000)
+    parser.add_argument("--cities", type=int, default=2_000)
+    args = parser.parse_args()
+    n = args.connections
+
+    before = build(DictConnection, n, args.cities)
+    after = build(Connection, n, args.cities)
+
+    print(f"{n:,} connections, {args.cities:,} cities")
+    print(f"{'bytes per connection':<24}{'__dict__':>10}{'slots':>10}{'saved':>10}")
+    for label, b, a in (("connection objects", before[0], after[0]), ("whole network", before[1], after[1])):
+        print(f"{label:<24}{b / n:>10.0f}{a / n:>10.0f}{(b - a) / b:>10.0%}")
+
+
+if __name__ == "__main__":
+    main()
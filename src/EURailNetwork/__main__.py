@@ -4,7 +4,7 @@ from datetime import datetime, time as dt_time
 from . import db_sqlite
 
 from EURailNetwork.registries import BookingSystem
-from .loader import read_raw_csv, build_network_from_df
+from .loader import load_network, load_network_parallel
 from .inspectors import (
     print_summary,
     print_city,
@@ -13,6 +13,7 @@ from .inspectors import (
     print_indirect_connection_results
 )
 from .utils_time import parse_time
+from .reachability import reachability_for
 
 
 init(autoreset=True)
@@ -72,6 +73,13 @@ def book_trip_flow(g, booking_system, db_connection=None):
     depart_city = input("Departure city: ").strip().lower()
     arrival_city = input("Arrival city: ").strip().lower()
 
+    # when no route joins any of the cities the names match (the same substring matching as the search below),
+    # the table built at startup rejects the pair before searching anything. it is only rebuilt here if connections
+    # were added since, in this process since the database connection is open
+    if reachability_for(g, workers=1).reachable_any(depart_city, arrival_city) is False:
+        print(Fore.RED + "No connections found between the specified cities. Booking process aborted." + Style.RESET_ALL)
+        return None
+
     direct_connections = g.search_connections(depart_city=depart_city, arrival_city=arrival_city)
     indirect_connections = g.find_indirect_connections(from_city=depart_city, to_city=arrival_city)
 
@@ -294,11 +302,21 @@ def main():
     p.add_argument("csv_path")
     p.add_argument("--head", type=int, default=1200,
                    help="Number of connections to preview (default=1200)")
+    p.add_argument("--workers", type=int, default=1,
+                   help="Processes used to parse the csv and build the reachability table (default=1)")
+    p.add_argument("--reachability-cache", default=None, metavar="DIR",
+                   help="Directory where the reachability table is cached between runs (default: not cached)")
     args = p.parse_args()
 
     # Load dataset
-    df = read_raw_csv(args.csv_path)
-    g = build_network_from_df(df)
+    if args.workers == 1:
+        g = load_network(args.csv_path)
+    else:
+        g = load_network_parallel(args.csv_path, workers=args.workers)
+
+    # the reachability table used by the booking pre-check is built now, before the database is opened,
+    # instead of during the first booking
+    reachability_for(g, cache_dir=args.reachability_cache, workers=args.workers)
 
     # sqlite loading ***********************************************!!!!
     conn = db_sqlite.connect("eurail.db") 
@@ -306,7 +324,7 @@ def main():
     booking_system = BookingSystem(railNetwork=g, db_connection=conn)
 
     # save static network 
-    db_sqlite.save_network(conn, g)
+    booking_system.db_connection_ids = db_sqlite.save_network(conn, g)
 
     # load previously saved trips/reservations from db into memory
     db_sqlite.load_trips(conn, booking_system, g)
@@ -423,59 +441,23 @@ def main():
                 print_connection_search_results(connections, sort_by, ascending)
             else:
                 print(Fore.RED + "\nNo direct connections found — searching for indirect routes...\n" + Style.RESET_ALL)
-                routes = g.find_indirect_connections(depart_city, arrival_city)
-
-                # --- Apply all filters to indirect routes ---
-                if routes:
-                    filtered_routes = []
-                    for route in routes:
-                        valid = True
-                        total_duration = route["total_minutes"]
-
-                        for seg in route["segments"]:
-                            # Train type
-                            if train_type and seg.train.name.lower() != train_type.lower():
-                                valid = False
-                                break
-                            # Prices
-                            if min_first_class_price is not None and seg.first_class_eur < min_first_class_price:
-                                valid = False
-                                break
-                            if max_first_class_price is not None and seg.first_class_eur > max_first_class_price:
-                                valid = False
-                                break
-                            if min_second_class_price is not None and seg.second_class_eur < min_second_class_price:
-                                valid = False
-                                break
-                            if max_second_class_price is not None and seg.second_class_eur > max_second_class_price:
-                                valid = False
-                                break
-                            # Time filters
-                            if min_departure_time and seg.dep_time < min_departure_time:
-                                valid = False
-                                break
-                            if max_departure_time and seg.dep_time > max_departure_time:
-                                valid = False
-                                break
-                            if min_arrival_time and seg.arr_time < min_arrival_time:
-                                valid = False
-                                break
-                            if max_arrival_time and seg.arr_time > max_arrival_time:
-                                valid = False
-                                break
-                            # Weekday filter
-                            if weekday is not None and weekday not in seg.days:
-                                valid = False
-                                break
-                        # Duration filter on total route
-                        if valid:
-                            if min_duration is not None and total_duration < min_duration:
-                                valid = False
-                            if max_duration is not None and total_duration > max_duration:
-                                valid = False
-                        if valid:
-                            filtered_routes.append(route)
-                    routes = filtered_routes
+                # the same filters are checked on every leg while the routes are expanded (duration on the whole route)
+                routes = g.find_indirect_connections(
+                    depart_city,
+                    arrival_city,
+                    train_type=train_type,
+                    min_first_class_price=min_first_class_price,
+                    max_first_class_price=max_first_class_price,
+                    min_second_class_price=min_second_class_price,
+                    max_second_class_price=max_second_class_price,
+                    min_departure_time=min_departure_time,
+                    max_departure_time=max_departure_time,
+                    min_arrival_time=min_arrival_time,
+                    max_arrival_time=max_arrival_time,
+                    min_duration=min_duration,
+                    max_duration=max_duration,
+                    weekday=weekday,
+                )
 
                 # --- Display filtered results ---
                 if not routes:
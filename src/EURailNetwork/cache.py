@@ -0,0 +1,55 @@
+from __future__ import annotations
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Hashable
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    size: int = 0
+    maxsize: int = 0
+
+
+# this class is a bounded least-recently-used cache of query results. every entry belongs to one version of the
+# network (RailNetwork bumps its version in add_connection): when a lookup comes with a new version, everything
+# cached for the previous one is dropped, so a result can never be older than the network it is returned for
+class QueryCache:
+    def __init__(self, maxsize: int = 256) -> None:
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self._entries: OrderedDict[Hashable, object] = OrderedDict()
+        self._version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # returns the cached value of the key, or computes, stores and returns it
+    def get_or_compute(self, key: Hashable, version: int, compute: Callable[[], object]):
+        if version != self._version:
+            self._entries.clear()
+            self._version = version
+        try:
+            value = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            value = self._entries[key] = compute()
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            return value
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return value
+
+    def stats(self) -> CacheStats:
+        return CacheStats(self.hits, self.misses, self.evictions, len(self._entries), self.maxsize)
+
+    def clear(self) -> None:
+        self._entries.clear()
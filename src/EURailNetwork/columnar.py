@@ -0,0 +1,103 @@
+from __future__ import annotations
+import numpy as np
+
+from .models import Connection
+
+# name -> dtype of every column kept for a connection. minutes of the day fit in int16, prices and ids in int32,
+# the 7 days of operation in one byte (bit d set = runs on weekday d)
+COLUMNS = {
+    "dep_min":          np.int16,
+    "arr_min":          np.int16,
+    "trip_minutes":     np.int32,
+    "first_class_eur":  np.int32,
+    "second_class_eur": np.int32,
+    "dep_city":         np.int32,
+    "arr_city":         np.int32,
+    "train":            np.int32,
+    "days":             np.uint8,
+}
+
+
+# columns that get a SortedIndex, i.e. the ones used by the time and duration range filters
+SORTED_COLUMNS = ("dep_min", "arr_min", "trip_minutes")
+
+
+# this class is a column-oriented mirror of RailNetwork.connections: row i holds the numbers of connections[i].
+# filters can then run as numpy boolean masks and only the surviving rows are turned back into Connection objects
+class ConnectionTable:
+    def __init__(self, capacity: int = 1024) -> None:
+        self._size = 0
+        # the city and train columns hold the registry ids (City.id / Train.id)
+        self._cols = {name: np.zeros(capacity, dtype=dt) for name, dt in COLUMNS.items()}
+        # sorted secondary indexes for the range filters of search_connections
+        self.indexes = {name: SortedIndex(self, name) for name in SORTED_COLUMNS}
+
+    def __len__(self) -> int:
+        return self._size
+
+    # returns a read-only view of one column, trimmed to the rows in use
+    def column(self, name: str) -> np.ndarray:
+        view = self._cols[name][:self._size]
+        view.flags.writeable = False
+        return view
+
+    # ids of the given cities/trains, to match against the id columns
+    @staticmethod
+    def ids(entities) -> np.ndarray:
+        return np.array([e.id for e in entities], dtype=np.int32)
+
+    def append(self, conn: Connection) -> int:
+        row = self._size
+        if row == len(self._cols["dep_min"]):
+            self._grow()
+        cols = self._cols
+        cols["dep_min"][row] = conn.dep_min
+        cols["arr_min"][row] = conn.arr_min
+        cols["trip_minutes"][row] = conn.trip_minutes
+        cols["first_class_eur"][row] = conn.first_class_eur
+        cols["second_class_eur"][row] = conn.second_class_eur
+        cols["dep_city"][row] = conn.dep_city.id
+        cols["arr_city"][row] = conn.arr_city.id
+        cols["train"][row] = conn.train.id
+        cols["days"][row] = conn.days_mask
+        self._size += 1
+        return row
+
+    # doubles every column so appends stay amortized O(1)
+    def _grow(self) -> None:
+        for name, col in self._cols.items():
+            bigger = np.zeros(max(2 * len(col), 1), dtype=col.dtype)
+            bigger[:len(col)] = col
+            self._cols[name] = bigger
+
+
+# this class keeps the rows of a ConnectionTable sorted by one column, so a range filter
+# (e.g. departures between 07:00 and 09:00) is two binary searches and a contiguous slice.
+# rows appended to the table since the last lookup are sorted and merged in on the next lookup,
+# which keeps ingest at O(1) per connection instead of one O(n) insertion per row
+class SortedIndex:
+    def __init__(self, table: ConnectionTable, column: str) -> None:
+        self._table = table
+        self._column = column
+        self._keys = np.empty(0, dtype=COLUMNS[column])
+        self._rows = np.empty(0, dtype=np.int64)
+
+    # rows with lo <= key <= hi (either bound can be None), ordered by key
+    def between(self, lo: int | None = None, hi: int | None = None) -> np.ndarray:
+        self._merge_pending()
+        start = 0 if lo is None else int(np.searchsorted(self._keys, lo, side="left"))
+        stop = len(self._keys) if hi is None else int(np.searchsorted(self._keys, hi, side="right"))
+        return self._rows[start:max(start, stop)]
+
+    def _merge_pending(self) -> None:
+        done, size = len(self._rows), len(self._table)
+        if done == size:
+            return
+        new_keys = self._table.column(self._column)[done:size]
+        order = np.argsort(new_keys, kind="stable")
+        new_keys = new_keys[order]
+        new_rows = order + done
+        # side="right" keeps equal keys in row order, like a stable sort of the whole column
+        at = np.searchsorted(self._keys, new_keys, side="right")
+        self._keys = np.insert(self._keys, at, new_keys)
+        self._rows = np.insert(self._rows, at, new_rows)
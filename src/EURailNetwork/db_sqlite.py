@@ -1,10 +1,11 @@
 from __future__ import annotations
 import sqlite3
 from datetime import time
-from typing import Iterable
+from typing import Iterable, Optional
 from .models import City, Train, Connection, Traveller, Trip, Reservation, Ticket
 from .registries import RailNetwork, BookingSystem
 from .utils_time import parse_time, format_time
+from .schema import weekdays
 
 
 def connect(db_path: str = "eurail.db") -> sqlite3.Connection: # create/open database file
@@ -82,37 +83,44 @@ def migrate(conn: sqlite3.Connection) -> None:
     conn.commit()
 
 
-# this function checks if a row with the given id already exists and returns it
-def _get_id(cur, table: str, name: str) -> int:
-    cur.execute(f"SELECT id FROM {table} WHERE name = ?", (name,))
-    row = cur.fetchone()
-    return row[0] if row else None
-
-# this function uses get_id to fetch for the id with the corresponding name. if it didn't find anything,
-# it creates the record.  
-def _ensure_named(cur, table: str, name: str) -> int:
-    _id = _get_id(cur, table, name)
-    if _id is not None:
-        return _id
-    cur.execute(f"INSERT INTO {table}(name) VALUES(?)", (name,))
-    return cur.lastrowid
-
-
-# this function takes all the static data in the network and saves them into db
-def save_network(conn: sqlite3.Connection, net: RailNetwork) -> None:
+# this function gives the db ids of all the entities of a registry (City or Train table) as a list indexed by the
+# registry id (City.id / Train.id). the table is read once; names that aren't in it are inserted when insert is
+# true and come back as None otherwise
+def _registry_db_ids(cur, table: str, registry, insert: bool = False) -> list[Optional[int]]:
+    cur.execute(f"SELECT name, id FROM {table}")
+    existing = dict(cur.fetchall())
+    ids = []
+    for e in registry.items:
+        _id = existing.get(e.name)
+        if _id is None and insert:
+            cur.execute(f"INSERT INTO {table}(name) VALUES(?)", (e.name,))
+            _id = cur.lastrowid
+        ids.append(_id)
+    return ids
+
+
+# ConnectionDay keeps one row per weekday, this function writes those rows from the days mask
+def save_connection_days(cur, connection_id: int, mask: int) -> None:
+    # delete other weekdays for this connection
+    cur.execute("DELETE FROM ConnectionDay WHERE connectionId = ?", (connection_id,))
+    cur.executemany("INSERT INTO ConnectionDay(connectionId, weekday) VALUES (?,?)",
+                    [(connection_id, d) for d in weekdays(mask)])
+
+
+# this function takes all the static data in the network and saves them into db. it returns the db id of every
+# connection as a list indexed by Connection.id, which save_trip uses to store the legs of a trip
+def save_network(conn: sqlite3.Connection, net: RailNetwork) -> list[int]:
     cur = conn.cursor()
+    connection_ids = []
 
-    for c in net.cities.items:
-        _ensure_named(cur, "City", c.name)  
-
-    for t in net.trains.items:
-        _ensure_named(cur, "Train", t.name)  
+    city_ids = _registry_db_ids(cur, "City", net.cities, insert=True)
+    train_ids = _registry_db_ids(cur, "Train", net.trains, insert=True)
 
     # insert/update connections 
     for con in net.connections:
-        dep_id   = _ensure_named(cur, "City",  con.dep_city.name)
-        arr_id   = _ensure_named(cur, "City",  con.arr_city.name)
-        train_id = _ensure_named(cur, "Train", con.train.name)
+        dep_id   = city_ids[con.dep_city.id]
+        arr_id   = city_ids[con.arr_city.id]
+        train_id = train_ids[con.train.id]
 
         dep_hhmm = (format_time(con.dep_time) if 'format_time' in globals() and format_time else format_time(con.dep_time))
         arr_hhmm = (format_time(con.arr_time) if 'format_time' in globals() and format_time else format_time(con.arr_time))
@@ -150,15 +158,15 @@ def save_network(conn: sqlite3.Connection, net: RailNetwork) -> None:
                   con.trip_minutes, con.first_class_eur, con.second_class_eur))
             conn_id = cur.lastrowid
 
-        # delete other weekdays for this connection
-        cur.execute("DELETE FROM ConnectionDay WHERE connectionId = ?", (conn_id,))
-        for d in sorted(con.days):
-            cur.execute("INSERT INTO ConnectionDay(connectionId, weekday) VALUES (?,?)", (conn_id, d))
+        save_connection_days(cur, conn_id, con.days_mask)
+        connection_ids.append(conn_id)
 
     conn.commit()
+    return connection_ids
 
 # this function saves the dynamic data (user’s trip, its connections, the travellers, and the reservations) into db
-def save_trip(conn: sqlite3.Connection, trip: Trip) -> None:
+# connection_ids are the db ids of the network's connections by Connection.id (save_network / connection_db_ids)
+def save_trip(conn: sqlite3.Connection, trip: Trip, connection_ids: list[Optional[int]]) -> None:
     cur = conn.cursor()
 
     # trip header
@@ -167,27 +175,9 @@ def save_trip(conn: sqlite3.Connection, trip: Trip) -> None:
     # (re)write to avoid duplicates
     cur.execute("DELETE FROM TripConnection WHERE tripId = ?", (trip.id,))
     for idx, con in enumerate(trip.connections):
-        dep_id   = _ensure_named(cur, "City",  con.dep_city.name)
-        arr_id   = _ensure_named(cur, "City",  con.arr_city.name)
-        train_id = _ensure_named(cur, "Train", con.train.name)
-
-        dep_hhmm = (format_time(con.dep_time) if 'format_time' in globals() and format_time else format_time(con.dep_time))
-        arr_hhmm = (format_time(con.arr_time) if 'format_time' in globals() and format_time else format_time(con.arr_time))
-
-        # find the matching connection row
-        cur.execute("""
-            SELECT id FROM Connection
-            WHERE routeId = ?
-              AND depCityId = ?
-              AND arrCityId = ?
-              AND depTime = ?
-              AND arrTime = ?
-              AND trainId = ?
-        """, (con.route_id, dep_id, arr_id, dep_hhmm, arr_hhmm, train_id))
-        row = cur.fetchone()
-        if not row:
+        connection_id = connection_ids[con.id] if 0 <= con.id < len(connection_ids) else None
+        if connection_id is None:
             raise RuntimeError("Connection not present in DB; call save_network() first.")
-        connection_id = row[0]
 
         cur.execute("""
             INSERT INTO TripConnection(tripId, seq, connectionId) VALUES (?,?,?)
@@ -209,6 +199,33 @@ def save_trip(conn: sqlite3.Connection, trip: Trip) -> None:
 
     conn.commit()
 
+# this function maps the ids of the Connection table to the connections of the network. rows are matched on their
+# natural key once for the whole table, with the cities and trains compared by db id, trip legs are then resolved by id
+def connections_by_db_id(cur, net: RailNetwork) -> dict[int, Connection]:
+    city_ids = _registry_db_ids(cur, "City", net.cities)
+    train_ids = _registry_db_ids(cur, "Train", net.trains)
+    by_key: dict[tuple, Connection] = {}
+    for c in net.connections:
+        key = (c.route_id, city_ids[c.dep_city.id], city_ids[c.arr_city.id], format_time(c.dep_time),
+               format_time(c.arr_time), train_ids[c.train.id])
+        by_key.setdefault(key, c)
+
+    cur.execute("SELECT id, routeId, depCityId, arrCityId, depTime, arrTime, trainId FROM Connection")
+    found = {}
+    for db_id, *key in cur.fetchall():
+        conn = by_key.get(tuple(key))
+        if conn is not None:
+            found[db_id] = conn
+    return found
+
+# this function gives the db id of every connection of the network (None if it isn't in the db), as a list indexed
+# by Connection.id like the one save_network returns, for a database the network was saved to earlier
+def connection_db_ids(conn: sqlite3.Connection, net: RailNetwork) -> list[Optional[int]]:
+    ids: list[Optional[int]] = [None] * len(net.connections)
+    for db_id, c in sorted(connections_by_db_id(conn.cursor(), net).items(), reverse=True):
+        ids[c.id] = db_id  # the lowest db id wins, like the first row of a SELECT
+    return ids
+
 # this function loads all the saved trips, travellers, etc from db and rebuilds them as python objects 
 def load_trips(conn: sqlite3.Connection, system: BookingSystem, net: RailNetwork) -> None:
     """
@@ -225,6 +242,9 @@ def load_trips(conn: sqlite3.Connection, system: BookingSystem, net: RailNetwork
                 else Traveller(first_name=fn, last_name=ln, age=age, id=tid))
         by_id[tid] = trav
 
+    # map back to existing connection objects in memory
+    by_db_id = connections_by_db_id(cur, net)
+
     # trips
     cur.execute("SELECT id FROM Trip")
     for (trip_id,) in cur.fetchall():
@@ -232,34 +252,13 @@ def load_trips(conn: sqlite3.Connection, system: BookingSystem, net: RailNetwork
 
         # ordered trip segments
         cur.execute("""
-            SELECT
-                c.routeId,
-                dc.name,         -- dep city name
-                ac.name,         -- arr city name
-                c.depTime,
-                c.arrTime,
-                t.name           -- train name
-            FROM TripConnection tc
-            JOIN Connection c  ON c.id  = tc.connectionId
-            JOIN City dc       ON dc.id = c.depCityId
-            JOIN City ac       ON ac.id = c.arrCityId
-            JOIN Train t       ON t.id  = c.trainId
-            WHERE tc.tripId = ?
-            ORDER BY tc.seq ASC
+            SELECT connectionId
+            FROM TripConnection
+            WHERE tripId = ?
+            ORDER BY seq ASC
         """, (trip_id,))
-        rows = cur.fetchall()
-
-        # map back to existing connection objects in memory
-        for route_id, dep, arr, dep_t, arr_t, train_name in rows:
-            match = next((
-                c for c in net.connections
-                if c.route_id == route_id
-                and c.dep_city.name == dep
-                and c.arr_city.name == arr
-                and ((format_time(c.dep_time) if 'format_time' in globals() and format_time else format_time(c.dep_time)) == dep_t)
-                and ((format_time(c.arr_time) if 'format_time' in globals() and format_time else format_time(c.arr_time)) == arr_t)
-                and c.train.name == train_name
-            ), None)
+        for (connection_id,) in cur.fetchall():
+            match = by_db_id.get(connection_id)
             if match is not None:
                 trip.connections.append(match)
 
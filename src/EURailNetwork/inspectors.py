@@ -1,7 +1,8 @@
 from collections import Counter
 from typing import Iterable
 from .models import Connection
-from .registries import RailNetwork, norm_name
+from .registries import RailNetwork
+from .schema import format_days
 from colorama import Fore, Style
 
 
@@ -36,14 +37,9 @@ def print_summary(net: RailNetwork, top: int = 1200) -> None:
 
 def print_city(g, city_name, limit=10):
     """Display information about a city (case-insensitive, supports substrings)."""
-    normalized_target = norm_name(city_name)
-    found_city = None
-
-    
-    for c in g.cities.items:
-        if normalized_target in norm_name(c.name):
-            found_city = c
-            break
+    # first city (in creation order) whose name contains the input, found through the trigram index
+    matches = g.cities.search(city_name)
+    found_city = matches[0] if matches else None
 
     if not found_city:
         print(Fore.RED + f"No city found matching '{city_name}'" + Style.RESET_ALL)
@@ -67,14 +63,9 @@ def print_city(g, city_name, limit=10):
 
 def print_train(g, train_name, limit=10):
     """Display information about a train (case-insensitive, supports partial match)."""
-    normalized_target = norm_name(train_name)
-    found_train = None
-
     # Match by substring (partial)
-    for t in g.trains.items:
-        if normalized_target in norm_name(t.name):
-            found_train = t
-            break
+    matches = g.trains.search(train_name)
+    found_train = matches[0] if matches else None
 
     if not found_train:
         print(Fore.RED + f"No train found matching '{train_name}'" + Style.RESET_ALL)
@@ -118,8 +109,7 @@ def print_connection_search_results(connections: list[Connection],
     print(f"\nFound {len(connections)} connections (sorted by {sort_label} {order_str}).\n")
 
     for i, c in enumerate(connections, 1):
-        day_names = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-        operating_days = ", ".join(day_names[d] for d in sorted(c.days))
+        operating_days = format_days(c.days_mask)
         duration_str = f"{c.trip_minutes // 60}h{c.trip_minutes % 60:02d}m"
 
         print(f"CONNECTION #{i}")
@@ -1,7 +1,13 @@
+import csv
+import io
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, Optional
+
+import numpy as np
 import pandas as pd
 from .models import Connection
-from .registries import RailNetwork
-from .utils_time import parse_time_with_offset, duration_minutes_with_offset
+from .registries import RailNetwork, norm_name
+from .utils_time import DAY_MINUTES, parse_minutes_with_offset
 from .schema import parse_days, parse_price_int
 
 # names of our columns after renaming them from the csv
@@ -10,9 +16,40 @@ COLS = [
     "train_type","days_of_operation","first_class_eur","second_class_eur"
 ]
 
+# rows read at a time by iter_raw_csv / load_network
+CHUNK_ROWS = 100_000
+# bytes of the file parsed by each task of load_network_parallel
+CHUNK_BYTES = 8 * 2**20
+
+# this method finds the delimiter of the csv file from its header line, the same way pandas does for sep=None
+# (csv.Sniffer on the first non-blank line), without making pandas fall back to its pure-python parser
+def sniff_delimiter(path: str) -> str:
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        for line in f:
+            if line.strip():
+                return csv.Sniffer().sniff(line).delimiter
+    raise ValueError(f"{path} is empty")
+
 # this method loads the csv file as strings, and returns a dataframe with columns COLS
+# the file is parsed by the C engine once the delimiter is known
 def read_raw_csv(path: str) -> pd.DataFrame:
-    df = pd.read_csv(path, dtype=str, keep_default_na=False, encoding="utf-8-sig", sep=None, engine="python")
+    df = pd.read_csv(path, sep=sniff_delimiter(path), dtype=str, keep_default_na=False, encoding="utf-8-sig",
+                     engine="c")
+    return _select_columns(df)
+
+# this method reads the csv file like read_raw_csv, but chunksize rows at a time. the index of the chunks keeps
+# counting across the file, so the row numbers in parse_columns errors are the same as with read_raw_csv
+def iter_raw_csv(path: str, chunksize: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    with pd.read_csv(path, sep=sniff_delimiter(path), dtype=str, keep_default_na=False, encoding="utf-8-sig",
+                     engine="c", chunksize=chunksize) as reader:
+        for chunk in reader:
+            df = _select_columns(chunk)
+            # the untrimmed chunk is not kept alive while the caller works on df
+            del chunk
+            yield df
+
+# this method renames the columns of the csv to COLS, keeps only those and trims their values
+def _select_columns(df: pd.DataFrame) -> pd.DataFrame:
     aliases = {
     "route_id": "route_id",
     "departure_city": "departure_city",
@@ -32,44 +69,225 @@ def read_raw_csv(path: str) -> pd.DataFrame:
     missing = [c for c in COLS if c not in df.columns]
     if missing:
         raise ValueError(f"Missing columns: {missing}. Found={list(df.columns)}")
-    df = df[COLS].apply(lambda s: s.str.strip())
-    return df
+    return pd.DataFrame({c: _strip(df[c]) for c in COLS})
+
+# same as s.str.strip(), but only the distinct values are stripped: apart from the route ids, the columns repeat
+# a small set of cities, times, trains, days and prices over the whole file
+def _strip(s: pd.Series) -> pd.Series:
+    codes, uniques = pd.factorize(s, use_na_sentinel=False)
+    return pd.Series(pd.Index(uniques).str.strip().take(codes), index=s.index, name=s.name)
 
 # this method creates a new instance of the railNetwork class and instantiates the attributes of connection like the 
 # dep_city, arr_city, etc. it then instantiates its own attributes and passes all the data to conn obj
 # it also adds it to the registry of the rail network
 def build_network_from_df(df: pd.DataFrame) -> RailNetwork:
     g = RailNetwork()
-    for i, row in df.iterrows():
-        dep_city = g.cities.get_or_create(row["departure_city"])
-        arr_city = g.cities.get_or_create(row["arrival_city"])
-        train    = g.trains.get_or_create(row["train_type"])
-
-        dep_t, dep_off = parse_time_with_offset(row["departure_time"])
-        arr_t, arr_off = parse_time_with_offset(row["arrival_time"])
-
-        if dep_off not in (0,):  
-            raise ValueError(f"Row {i}: departure_time has unexpected day offset '(+{dep_off}d)'")
-        
-        days  = parse_days(row["days_of_operation"])
-        p1    = parse_price_int(row["first_class_eur"])
-        p2    = parse_price_int(row["second_class_eur"])
-        dur   = duration_minutes_with_offset(dep_t, arr_t, arr_day_offset=arr_off)
-
-        if dep_city is arr_city:
-            raise ValueError(f"Row {i}: departure equals arrival ({dep_city.name})")
-
-        conn = Connection(
-            route_id=row["route_id"],
+    add_rows(g, df, parse_columns(df))
+    return g
+
+# this method builds the same network as build_network_from_df(read_raw_csv(path)) straight from the file, one
+# chunk at a time: each chunk is parsed, added to the network and dropped before the next one is read, so memory
+# peaks at the network plus one chunk instead of the network plus the whole table of strings
+def load_network(path: str, chunksize: int = CHUNK_ROWS) -> RailNetwork:
+    g = RailNetwork()
+    for df in iter_raw_csv(path, chunksize):
+        add_rows(g, df, parse_columns(df))
+    return g
+
+# this method builds the same network as load_network with the parsing spread over a process pool. the file is cut
+# into pieces of about chunk_bytes at line breaks outside quoted values (see _line_ranges), the workers
+# parse and validate their piece into compact rows (_compact) and the parent adds the pieces to the network in
+# file order, interning the cities and trains. workers count rows from 0 in their piece and the parent adds the
+# rows of the pieces before it, so errors carry the same row numbers as with read_raw_csv
+def load_network_parallel(path: str, workers: Optional[int] = None, chunk_bytes: int = CHUNK_BYTES) -> RailNetwork:
+    from .parallel import imap_ordered, window_for
+
+    sep = sniff_delimiter(path)
+    header = pd.read_csv(path, sep=sep, nrows=0, dtype=str, encoding="utf-8-sig", engine="c")
+    _select_columns(header)  # missing columns are reported before any work is sent out
+    tasks = ((path, start, end, sep, list(header.columns)) for start, end in _line_ranges(path, chunk_bytes))
+
+    g = RailNetwork()
+    if workers == 1:
+        _add_pieces(g, (_parse_piece(*task) for task in tasks))
+        return g
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        _add_pieces(g, imap_ordered(pool, _parse_piece, tasks, window_for(workers)))
+    return g
+
+def _add_pieces(g: RailNetwork, pieces) -> None:
+    offset = 0
+    for n, rows, bad in pieces:
+        if bad is not None:
+            pos, row = bad
+            _raise_row(offset + pos, pd.Series(row))
+        if rows is not None:
+            _add_compact(g, rows)
+        offset += n
+
+# (start, end) byte offsets of the pieces of the file after its header line. a piece ends at the first line break
+# after chunk_bytes that is outside a quoted value, i.e. where the number of quote characters since the end of
+# the header is even ("" inside a quoted value counts twice). a stray quote in an unquoted value only makes the
+# piece longer, never cuts a row
+def _line_ranges(path: str, chunk_bytes: int) -> Iterator[tuple[int, int]]:
+    with open(path, "rb") as f:
+        # the header is the first non-blank line, as in sniff_delimiter
+        line = f.readline()
+        while line and not line.strip():
+            line = f.readline()
+        quotes = line.count(b'"')
+        while line and quotes % 2:
+            line = f.readline()
+            quotes += line.count(b'"')
+        start = f.tell()
+        while True:
+            data = f.read(max(chunk_bytes, 1))
+            if not data:
+                return
+            quotes = data.count(b'"')
+            ends_line = data.endswith(b"\n")
+            while not ends_line or quotes % 2:
+                line = f.readline()
+                if not line:
+                    break
+                quotes += line.count(b'"')
+                ends_line = line.endswith(b"\n")
+            end = f.tell()
+            yield start, end
+            start = end
+
+# worker side of load_network_parallel: the number of rows of the piece, and either its compact rows or the
+# position and values of its first invalid row
+def _parse_piece(path: str, start: int, end: int, sep: str, names: list[str]):
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    if not data.strip():
+        return 0, None, None
+    df = pd.read_csv(io.BytesIO(data), sep=sep, header=None, names=names, dtype=str, keep_default_na=False,
+                     encoding="utf-8", engine="c")
+    df = _select_columns(df)
+    cols, bad = _parse_columns(df)
+    if bad is not None:
+        return len(df), None, (bad, df.iloc[bad].to_dict())
+    return len(df), _compact(df, cols), None
+
+# this method parses and validates the time, days and price columns of a dataframe from read_raw_csv as whole
+# columns: every distinct string is parsed once (pd.factorize) and the results are spread over the rows with numpy.
+# it returns one array per field, row i of each being row i of df. the first invalid row raises ValueError with
+# its row number (the index of df) and the message of the scalar parser
+def parse_columns(df: pd.DataFrame) -> dict[str, np.ndarray]:
+    cols, bad = _parse_columns(df)
+    if bad is not None:
+        _raise_row(df.index[bad], df.iloc[bad])
+    return cols
+
+# same as parse_columns, but returns the position of the first invalid row (or None) instead of raising
+def _parse_columns(df: pd.DataFrame) -> tuple[dict[str, np.ndarray], Optional[int]]:
+    dep_min, dep_off, bad_dep = _parse_distinct(df["departure_time"], parse_minutes_with_offset, 2)
+    arr_min, arr_off, bad_arr = _parse_distinct(df["arrival_time"], parse_minutes_with_offset, 2)
+    days, bad_days = _parse_distinct(df["days_of_operation"], parse_days)
+    first, bad_first = _parse_distinct(df["first_class_eur"], parse_price_int)
+    second, bad_second = _parse_distinct(df["second_class_eur"], parse_price_int)
+    same_city = _same_city(df["departure_city"], df["arrival_city"])
+
+    bad = bad_dep | bad_arr | (dep_off != 0) | bad_days | bad_first | bad_second | same_city
+
+    # same rule as utils_time.trip_minutes: an arrival that isn't after the departure is on the next day
+    trip = arr_min + arr_off * DAY_MINUTES - dep_min
+    trip[trip <= 0] += DAY_MINUTES
+    cols = {
+        "dep_min": dep_min,
+        "arr_min": arr_min,
+        "days_mask": days,
+        "first_class_eur": first,
+        "second_class_eur": second,
+        "trip_minutes": trip,
+    }
+    return cols, (int(bad.argmax()) if bad.any() else None)
+
+# this method creates the connections of the rows of df, parsed by parse_columns, and adds them to the network.
+# cities and trains are interned once per distinct name, in the order they first appear in the rows
+def add_rows(g: RailNetwork, df: pd.DataFrame, cols: dict[str, np.ndarray]) -> None:
+    _add_compact(g, _compact(df, cols))
+
+# the rows of df reduced to plain data that is cheap to pickle: the route ids, the city and train names as codes
+# into lists of distinct names (in order of first appearance, each departure before its arrival) and the columns
+def _compact(df: pd.DataFrame, cols: dict[str, np.ndarray]) -> tuple:
+    names = np.empty(2 * len(df), dtype=object)
+    names[0::2] = df["departure_city"].to_numpy(dtype=object)
+    names[1::2] = df["arrival_city"].to_numpy(dtype=object)
+    city_codes, city_names = pd.factorize(names)
+    train_codes, train_names = pd.factorize(df["train_type"].to_numpy(dtype=object))
+    return df["route_id"].tolist(), city_codes, list(city_names), train_codes, list(train_names), cols
+
+def _add_compact(g: RailNetwork, rows: tuple) -> None:
+    route_ids, city_codes, city_names, train_codes, train_names, cols = rows
+    cities = _intern(g.cities, city_names, city_codes)
+    trains = _intern(g.trains, train_names, train_codes)
+
+    rows = zip(
+        route_ids, cities[0::2], cities[1::2], trains,
+        *(cols[k].tolist() for k in ("dep_min", "arr_min", "days_mask", "first_class_eur", "second_class_eur",
+                                     "trip_minutes")),
+    )
+    for route_id, dep_city, arr_city, train, dep_min, arr_min, days, p1, p2, dur in rows:
+        g.add_connection(Connection(
+            route_id=route_id,
             dep_city=dep_city,
             arr_city=arr_city,
-            dep_time=dep_t,
-            arr_time=arr_t,
-            days=days,
+            dep_min=dep_min,
+            arr_min=arr_min,
+            days_mask=days,
             first_class_eur=p1,
             second_class_eur=p2,
             train=train,
             trip_minutes=dur,
-        )
-        g.add_connection(conn)
-    return g
+        ))
+
+# the registry entity of every row, with get_or_create called once per distinct name
+def _intern(registry, names: list[str], codes: np.ndarray) -> list:
+    entities = [registry.get_or_create(name) for name in names]
+    return [entities[k] for k in codes.tolist()]
+
+# parses every distinct value of the column once. returns the width fields of the parsed values spread over the
+# rows (one int64 array each) and the mask of the rows whose value does not parse
+def _parse_distinct(s: pd.Series, parse, width: int = 1):
+    codes, uniques = pd.factorize(s, use_na_sentinel=False)
+    values = np.zeros((len(uniques), width), dtype=np.int64)
+    ok = np.ones(len(uniques), dtype=bool)
+    for k, value in enumerate(uniques):
+        try:
+            values[k] = parse(value)
+        except (ValueError, KeyError, TypeError, AttributeError, OverflowError):
+            ok[k] = False
+    values = values[codes]
+    return (*(values[:, j] for j in range(width)), ~ok[codes])
+
+# mask of the rows whose departure and arrival are the same city once the names are normalized
+def _same_city(dep: pd.Series, arr: pd.Series) -> np.ndarray:
+    codes, uniques = pd.factorize(pd.concat([dep, arr], ignore_index=True), use_na_sentinel=False)
+    keys, _ = pd.factorize(pd.Index([norm_name(name) for name in uniques]), use_na_sentinel=False)
+    keys = keys[codes]
+    return keys[:len(dep)] == keys[len(dep):]
+
+# raises the error of an invalid row found by _parse_columns
+def _raise_row(i, row: pd.Series) -> None:
+    _check_row(i, row)
+    raise ValueError(f"Row {i}: value out of range")
+
+# runs the checks of one row with the scalar parsers, in the order build_network_from_df always ran them,
+# and raises the first error with the row number
+def _check_row(i, row: pd.Series) -> None:
+    try:
+        _, dep_off = parse_minutes_with_offset(row["departure_time"])
+        parse_minutes_with_offset(row["arrival_time"])
+        if dep_off not in (0,):
+            raise ValueError(f"departure_time has unexpected day offset '(+{dep_off}d)'")
+        parse_days(row["days_of_operation"])
+        parse_price_int(row["first_class_eur"])
+        parse_price_int(row["second_class_eur"])
+        if norm_name(row["departure_city"]) == norm_name(row["arrival_city"]):
+            raise ValueError(f"departure equals arrival ({row['departure_city']})")
+    except (ValueError, KeyError, TypeError, AttributeError, OverflowError) as e:
+        raise ValueError(f"Row {i}: {e}") from e
@@ -1,47 +1,79 @@
 from __future__ import annotations
 from dataclasses import dataclass, field
 from datetime import time
-from typing import FrozenSet
+from typing import ClassVar, FrozenSet
 import random
 import string
 
+from .schema import weekdays
+from .utils_time import DAY_MINUTES, from_minutes, layover_ok_minutes
+
 # because we later map the days of the week to integers for easier tracking 
 Weekday = int  
 
+# the model classes use slots=True: no per-instance __dict__, which is most of the memory of a connection.
 # default_factory=list means that a new list is create for every new City instance
-@dataclass
+# key is the normalized name (registries.norm_name) and id the dense position of the entity in its registry
+# (cities.items[id]), both set once when the registry interns the entity
+@dataclass(slots=True)
 class City:
     name: str
     departures: list["Connection"] = field(default_factory=list)
     arrivals: list["Connection"]   = field(default_factory=list)
+    key: str = field(default="", repr=False, compare=False)
+    id: int = field(default=-1, repr=False, compare=False)
 
-@dataclass
+@dataclass(slots=True)
 class Train:
     name: str
     connections: list["Connection"] = field(default_factory=list)
+    key: str = field(default="", repr=False, compare=False)
+    id: int = field(default=-1, repr=False, compare=False)
 
 # connection object holds references to the other two objects above
-# frozenset (immutable version of the set object) means that once it's created its 
-# elements can't be modified. in this case, days is an immutable set of weekdays
-@dataclass
+# dep_min / arr_min are the departure and arrival times in minutes since midnight (utils_time), the arrival
+# being day_offset days after the departure day. dep_time / arr_time give them back as time objects for display
+# days_mask is the 7-bit mask of the weekdays the connection runs on (bit d = weekday d, see schema.py)
+# id is the dense position of the connection in its network (RailNetwork.connections[id]), set by add_connection.
+# connections compare by identity: the generated __eq__ would compare cities and their connection lists recursively
+@dataclass(slots=True, eq=False)
 class Connection:
     route_id: str
     dep_city: City
     arr_city: City
-    dep_time: time
-    arr_time: time
-    days: FrozenSet[Weekday]
+    dep_min: int
+    arr_min: int
+    days_mask: int
     first_class_eur: int 
     second_class_eur: int
     train: Train
     trip_minutes: int
+    id: int = field(default=-1, repr=False)
+
+    @property
+    def dep_time(self) -> time:
+        return from_minutes(self.dep_min)
+
+    @property
+    def arr_time(self) -> time:
+        return from_minutes(self.arr_min)
+
+    # 0 when the train arrives on the day it left, 1 for a (+1d) arrival, ...
+    @property
+    def day_offset(self) -> int:
+        return (self.dep_min + self.trip_minutes) // DAY_MINUTES
+
+    # read-only set view of the days of operation, built from the mask on demand
+    @property
+    def days(self) -> FrozenSet[Weekday]:
+        return frozenset(weekdays(self.days_mask))
 
 # This is the method that will generate an alphanumeric ID for every trip (global)
 #def generate_trip_id() -> str:
     #letters = ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
     #return f"TRP-{letters}"
 
-@dataclass
+@dataclass(slots=True)
 class Trip:
     id: str = "" # empty string until BookingSystem generates the id upon booking
     reservations: list["Reservation"] = field(default_factory=list)
@@ -54,40 +86,18 @@ class Trip:
     def add_reservation(self, reservation: "Reservation") -> None:
         self.reservations.append(reservation)
 
-    # calculate layover
-    def _layover_min(self, next_dep:time, current_arr:time) -> int: # returns layover duration in minutes (int)
-        arr_min = (current_arr.hour * 60) + current_arr.minute
-        dep_min = (next_dep.hour * 60) + next_dep.minute
-        if dep_min >= arr_min:
-            # Same day
-            return dep_min - arr_min
-        else:
-            # Next day
-            return (1440 - arr_min) + dep_min
-
     # Add layover rules #################################
         # Daytime: No layovers of more than 2 hours
         # Nighttime: No layovers of more than 30 minutes
         # At any time of day: At least 10 min to walk to the right stop and prepare tickets and suitcases
+    # the rules live in utils_time.layover_ok_minutes so the route search can prune with exactly the same check
     def validate_layover(self) -> bool:
         for i in range(len(self.connections)-1):
-            current_arr = self.connections[i].arr_time
-            next_dept = self.connections[i+1].dep_time
-
-            # calculate layover duration in min to make sure it respects layover rules
-            layover_duration = self._layover_min(next_dept, current_arr)
-
-            # daytime layover rule: 2 hours or less
-            if 6 <= next_dept.hour < 19: # daytime = between 6AM (incl) - 7PM (excl)
-                if not (10 <= layover_duration <= 120):
-                    return False
-            else: # nighttime = between 7PM (incl) - 6AM (excl)
-                if not (10 <= layover_duration <= 30):
-                    return False
-                
+            if not layover_ok_minutes(self.connections[i].arr_min, self.connections[i+1].dep_min):
+                return False
         return True
 
-@dataclass
+@dataclass(slots=True)
 class Traveller:
     first_name: str
     last_name: str
@@ -102,7 +112,7 @@ class Traveller:
     def list_trips(self) -> list["Trip"]:
         return [r.trip for r in self.reservations]
 
-@dataclass(eq=False)  # Disable automatic equality to prevent circular comparison
+@dataclass(eq=False, slots=True)  # Disable automatic equality to prevent circular comparison
 class Reservation:
     traveller: Traveller
     ticket: "Ticket"
@@ -121,10 +131,11 @@ class Reservation:
             f"on trip {self.trip.id} ({route}) - ticket #: {self.ticket.id}"
          )
 
-@dataclass(eq=False)  # Disable automatic equality to prevent circular comparison
+@dataclass(eq=False, slots=True)  # Disable automatic equality to prevent circular comparison
 class Ticket:
     reservation: "Reservation" = None  # Allow None to break circular dependency
-    _id_counter: int = field(default=0, init=False, repr=False, compare=False)
+    # shared by all tickets (a class attribute, not a slot)
+    _id_counter: ClassVar[int] = 0
     id: int = field(init=False)
 
     def __post_init__(self):
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+
+# this class indexes normalized names by their n-grams (trigrams by default) so a substring query only
+# has to check the names that contain every n-gram of the pattern, instead of every name in the registry.
+# names get dense ids in insertion order (the position of the entity in its registry's items list)
+class NGramIndex:
+    def __init__(self, n: int = 3) -> None:
+        self.n = n
+        self._keys: list[str] = []
+        self._postings: dict[str, list[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    # adds an already normalized name and returns its id
+    def add(self, key: str) -> int:
+        ident = len(self._keys)
+        self._keys.append(key)
+        for gram in set(self._grams(key)):
+            self._postings.setdefault(gram, []).append(ident)
+        return ident
+
+    # ids (in increasing order) of the names that contain the already normalized pattern
+    def search(self, pattern: str) -> list[int]:
+        keys = self._keys
+        if len(pattern) < self.n:
+            # too short to have an n-gram, the stored keys are already normalized so this is a plain scan
+            return [i for i, k in enumerate(keys) if pattern in k]
+
+        postings = []
+        for gram in set(self._grams(pattern)):
+            ids = self._postings.get(gram)
+            if not ids:
+                return []
+            postings.append(ids)
+        postings.sort(key=len)
+        candidates = set(postings[0]).intersection(*postings[1:])
+        # sharing all the n-grams does not mean they are contiguous, so the candidates are verified
+        return sorted(i for i in candidates if pattern in keys[i])
+
+    def _grams(self, s: str):
+        n = self.n
+        return (s[i:i + n] for i in range(len(s) - n + 1))
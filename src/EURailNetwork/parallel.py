@@ -0,0 +1,115 @@
+from __future__ import annotations
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Iterable, Iterator, Optional
+
+from .models import Connection
+from .registries import RailNetwork
+
+# the network of the current worker process, set once by the pool initializer
+_network: Optional[RailNetwork] = None
+
+
+# this function turns a network into plain rows (city names, train names and one tuple per connection) that are
+# cheap to pickle. restore() builds the same network back, with cities, trains and connections in the same order,
+# so city, train and connection ids mean the same thing on both sides
+def snapshot(net: RailNetwork) -> tuple:
+    rows = [
+        (c.route_id, c.dep_city.id, c.arr_city.id, c.dep_min, c.arr_min, c.days_mask,
+         c.first_class_eur, c.second_class_eur, c.train.id, c.trip_minutes)
+        for c in net.connections
+    ]
+    return [c.name for c in net.cities.items], [t.name for t in net.trains.items], rows
+
+def restore(snap: tuple) -> RailNetwork:
+    city_names, train_names, rows = snap
+    net = RailNetwork()
+    cities = [net.cities.get_or_create(name) for name in city_names]
+    trains = [net.trains.get_or_create(name) for name in train_names]
+    for route_id, dep, arr, dep_min, arr_min, days, first, second, train, trip in rows:
+        net.add_connection(Connection(
+            route_id=route_id,
+            dep_city=cities[dep],
+            arr_city=cities[arr],
+            dep_min=dep_min,
+            arr_min=arr_min,
+            days_mask=days,
+            first_class_eur=first,
+            second_class_eur=second,
+            train=trains[train],
+            trip_minutes=trip,
+        ))
+    return net
+
+
+def _init_worker(payload) -> None:
+    global _network
+    _network = payload if isinstance(payload, RailNetwork) else restore(payload)
+
+# the network shipped to this worker by network_pool
+def worker_network() -> RailNetwork:
+    if _network is None:
+        raise RuntimeError("worker_network() called outside of a network_pool worker")
+    return _network
+
+# a process pool whose workers all hold the network. where processes can be forked the workers inherit it from
+# the parent as is (nothing is pickled), otherwise its snapshot is sent once to every worker and rebuilt there.
+# tasks then only carry small arguments (city names, connection ids) instead of the network
+def network_pool(net: RailNetwork, workers: Optional[int] = None) -> ProcessPoolExecutor:
+    if "fork" in multiprocessing.get_all_start_methods():
+        ctx, payload = multiprocessing.get_context("fork"), net
+    else:
+        ctx, payload = multiprocessing.get_context("spawn"), snapshot(net)
+    return ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_init_worker, initargs=(payload,))
+
+
+# this function answers many indirect route queries (origin, destination, weekday) with find_indirect_connections
+# spread over a network_pool. queries go out in chunks and at most a few chunks per worker are in flight, so the
+# queries can come from a generator and the routes stream back in input order as soon as the head chunk is done.
+# workers only send back connection ids, the parent turns them back into its own Connection objects
+def route_batch(net: RailNetwork, queries: Iterable[tuple], max_stops: int = 2, workers: Optional[int] = None,
+                chunksize: int = 32, **filters) -> Iterator[list[dict]]:
+    queries = iter(queries)
+    chunks = iter(lambda: list(islice(queries, chunksize)), [])
+    if workers == 1:
+        for chunk in chunks:
+            for origin, target, weekday in chunk:
+                yield net.find_indirect_connections(origin, target, max_stops, weekday=weekday, **filters)
+        return
+
+    conns = net.connections
+    with network_pool(net, workers) as pool:
+        tasks = ((chunk, max_stops, filters) for chunk in chunks)
+        for routes in imap_ordered(pool, _route_chunk, tasks, window_for(workers)):
+            yield from _rehydrate(conns, routes)
+
+# number of tasks imap_ordered keeps in flight for a pool of that many workers (None = one per core)
+def window_for(workers: Optional[int]) -> int:
+    return 4 * (workers or os.cpu_count() or 1)
+
+# submits fn(*args) to the pool for every args of tasks, with at most window of them in flight, and yields the
+# results in input order. tasks can be a generator, it is only consumed as results are taken
+def imap_ordered(pool: ProcessPoolExecutor, fn, tasks: Iterable[tuple], window: int) -> Iterator:
+    pending = deque()
+    for args in tasks:
+        pending.append(pool.submit(fn, *args))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+def _route_chunk(chunk: list[tuple], max_stops: int, filters: dict) -> list[list[tuple]]:
+    net = worker_network()
+    out = []
+    for origin, target, weekday in chunk:
+        routes = net.find_indirect_connections(origin, target, max_stops, weekday=weekday, **filters)
+        out.append([(tuple(c.id for c in r["segments"]), r["wait_times"], r["total_minutes"]) for r in routes])
+    return out
+
+def _rehydrate(conns: list, chunk: list[list[tuple]]) -> Iterator[list[dict]]:
+    for routes in chunk:
+        yield [{"segments": [conns[i] for i in rows], "wait_times": waits, "total_minutes": total}
+               for rows, waits, total in routes]
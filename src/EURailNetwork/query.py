@@ -0,0 +1,176 @@
+from __future__ import annotations
+from dataclasses import dataclass, replace
+from datetime import time
+from typing import TYPE_CHECKING, Callable, Optional
+
+import numpy as np
+
+from .models import Connection
+from .schema import runs_on
+from .utils_time import to_minutes
+
+if TYPE_CHECKING:
+    from .registries import RailNetwork
+
+# sort keys accepted by search_connections. unknown values fall back to (dep_time, route_id)
+SORT_KEYS: dict[str, Callable[[Connection], tuple]] = {
+    "dep_city":         lambda c: (c.dep_city.name.lower(), c.dep_min, c.route_id),
+    "arr_city":         lambda c: (c.arr_city.name.lower(), c.dep_min, c.route_id),
+    "train_name":       lambda c: (c.train.name.lower(), c.dep_min, c.route_id),
+    "first_class_eur":  lambda c: (c.first_class_eur, c.dep_min, c.route_id),
+    "second_class_eur": lambda c: (c.second_class_eur, c.dep_min, c.route_id),
+    "dep_time":         lambda c: (c.dep_min, c.arr_min, c.route_id),
+    "arr_time":         lambda c: (c.arr_min, c.dep_min, c.route_id),
+    "trip_minutes":     lambda c: (c.trip_minutes, c.dep_min, c.route_id),
+}
+
+def _default_sort_key(c: Connection) -> tuple:
+    return (c.dep_min, c.route_id)
+
+
+# this class holds every filter of search_connections. instead of copying the network once per filter,
+# it picks the smallest index it can start from (cities, trains, time ranges) and then evaluates all the other filters
+# as numpy masks over the columnar table, only the rows that survive are turned back into Connection objects
+@dataclass(frozen=True)
+class ConnectionQuery:
+    depart_city: Optional[str] = None
+    arrival_city: Optional[str] = None
+    train_type: Optional[str] = None
+    min_first_class_price: Optional[int] = None
+    max_first_class_price: Optional[int] = None
+    min_second_class_price: Optional[int] = None
+    max_second_class_price: Optional[int] = None
+    min_departure_time: Optional[time] = None
+    max_departure_time: Optional[time] = None
+    min_arrival_time: Optional[time] = None
+    max_arrival_time: Optional[time] = None
+    min_duration: Optional[int] = None
+    max_duration: Optional[int] = None
+    weekday: Optional[int] = None
+    sort_by: str = "dep_time"
+    ascending: bool = True
+
+    # the same query with the names normalized the way run() matches them, so "Paris" and " paris" share a key
+    def cache_key(self) -> ConnectionQuery:
+        from .registries import norm_name
+        key = lambda name: (norm_name(name) or None) if name else None
+        return replace(self, depart_city=key(self.depart_city), arrival_city=key(self.arrival_city),
+                       train_type=key(self.train_type))
+
+    def run(self, net: RailNetwork) -> list[Connection]:
+        # the city/train filters are resolved once through the registries' name indexes (None = no filter),
+        # so rows are checked by entity id instead of normalizing names on every connection
+        dep_cities = net.cities.search(self.depart_city) if self.depart_city else None
+        arr_cities = net.cities.search(self.arrival_city) if self.arrival_city else None
+        trains = net.trains.search(self.train_type) if self.train_type else None
+
+        ranges = (
+            ("dep_min", _minutes(self.min_departure_time), _minutes(self.max_departure_time)),
+            ("arr_min", _minutes(self.min_arrival_time), _minutes(self.max_arrival_time)),
+            ("trip_minutes", self.min_duration, self.max_duration),
+        )
+        table = net.table
+
+        # every access path knows its exact size up front: the index lists of the matched entities,
+        # or a binary-searched slice of a sorted time/duration index. we start from the smallest one
+        paths = []
+        if dep_cities is not None:
+            lists = [c.departures for c in dep_cities]
+            paths.append((sum(map(len, lists)), "dep", lambda lists=lists: _rows_in_network_order(lists)))
+        if arr_cities is not None:
+            lists = [c.arrivals for c in arr_cities]
+            paths.append((sum(map(len, lists)), "arr", lambda lists=lists: _rows_in_network_order(lists)))
+        if trains is not None:
+            lists = [t.connections for t in trains]
+            paths.append((sum(map(len, lists)), "train", lambda lists=lists: _rows_in_network_order(lists)))
+        for name, lo, hi in ranges:
+            if lo is not None or hi is not None:
+                found = table.indexes[name].between(lo, hi)
+                paths.append((len(found), name, lambda found=found: np.sort(found)))
+
+        used = None
+        rows = None  # None means every row of the table
+        if paths:
+            _, used, make_rows = min(paths, key=lambda p: p[0])
+            rows = make_rows()
+
+        def col(name: str) -> np.ndarray:
+            full = table.column(name)
+            return full if rows is None else full[rows]
+
+        # the remaining filters become one boolean mask over the candidate rows
+        mask = None
+        def keep(m: np.ndarray) -> None:
+            nonlocal mask
+            mask = m if mask is None else mask & m
+
+        if used != "dep" and dep_cities is not None:
+            keep(np.isin(col("dep_city"), table.ids(dep_cities)))
+        if used != "arr" and arr_cities is not None:
+            keep(np.isin(col("arr_city"), table.ids(arr_cities)))
+        if used != "train" and trains is not None:
+            keep(np.isin(col("train"), table.ids(trains)))
+
+        for name, lo, hi in (
+            ("first_class_eur", self.min_first_class_price, self.max_first_class_price),
+            ("second_class_eur", self.min_second_class_price, self.max_second_class_price),
+            *ranges,
+        ):
+            if name == used:
+                continue
+            if lo is not None:
+                keep(col(name) >= lo)
+            if hi is not None:
+                keep(col(name) <= hi)
+
+        if self.weekday is not None:
+            bit = 1 << self.weekday if 0 <= self.weekday < 7 else 0
+            keep((col("days") & bit) != 0)
+
+        if rows is None:
+            rows = np.flatnonzero(mask) if mask is not None else None
+        elif mask is not None:
+            rows = rows[mask]
+
+        conns = net.connections
+        results = list(conns) if rows is None else [conns[i] for i in rows.tolist()]
+
+        key = SORT_KEYS.get(self.sort_by, _default_sort_key)
+        results.sort(key=key, reverse=not self.ascending)
+        return results
+
+    # the filters other than the cities and the duration as a check on one connection, for the searches that
+    # expand connections one at a time (indirect routes). None when there is nothing to check
+    def leg_filter(self, net: RailNetwork) -> Optional[Callable[[Connection], bool]]:
+        checks = []
+        if self.train_type:
+            trains = {t.id for t in net.trains.search(self.train_type)}
+            checks.append(lambda c: c.train.id in trains)
+        for attr, lo, hi in (
+            ("first_class_eur", self.min_first_class_price, self.max_first_class_price),
+            ("second_class_eur", self.min_second_class_price, self.max_second_class_price),
+            ("dep_min", _minutes(self.min_departure_time), _minutes(self.max_departure_time)),
+            ("arr_min", _minutes(self.min_arrival_time), _minutes(self.max_arrival_time)),
+        ):
+            if lo is not None:
+                checks.append(lambda c, attr=attr, lo=lo: getattr(c, attr) >= lo)
+            if hi is not None:
+                checks.append(lambda c, attr=attr, hi=hi: getattr(c, attr) <= hi)
+        if self.weekday is not None:
+            weekday = self.weekday
+            checks.append(lambda c: runs_on(c.days_mask, weekday))
+
+        if not checks:
+            return None
+        return lambda c: all(check(c) for check in checks)
+
+
+def _minutes(t: Optional[time]) -> Optional[int]:
+    return None if t is None else to_minutes(t)
+
+# the per-entity lists are disjoint (a connection has one departure city, one arrival city and one train),
+# so their rows (the connection ids) only have to be sorted to come back in network order for the stable sort to stay identical
+def _rows_in_network_order(lists: list[list[Connection]]) -> np.ndarray:
+    rows = np.fromiter((c.id for l in lists for c in l), dtype=np.int64)
+    rows.sort()
+    return rows
@@ -0,0 +1,183 @@
+from __future__ import annotations
+import hashlib
+import os
+from itertools import repeat
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from .cache import QueryCache
+from .parallel import network_pool, snapshot, worker_network
+from .registries import RailNetwork
+from .schema import common_days, weekdays
+from .utils_time import MAX_DAY_LAYOVER, MAX_NIGHT_LAYOVER, MIN_LAYOVER, layover_ok_minutes, wait_minutes
+
+# day slot of the tables that ignores the days of operation (slots 0..6 are the weekdays)
+ANY_DAY = 7
+UNREACHABLE = -1
+# bump when the content of the cached tables changes
+_FORMAT = 2
+
+
+# this class answers "is there any route from A to B" in O(1) from a table precomputed over every pair of cities.
+# a route is what the booking flow offers: a direct connection or an indirect route of up to max_stops changes
+# that follows the layover rules. for each weekday (and ANY_DAY) the table keeps the set of cities every city can
+# reach with routes whose legs all run that day, as one bit per pair (np.packbits along the destination axis,
+# indexed [day, origin, destination byte] by city id), so it takes n² bytes for n cities.
+# the shortest total time and the fewest transfers are not kept for every pair: they are computed for one origin
+# when they are asked for, by the same search as the table, and the last origins asked for are kept
+class ReachabilityTable:
+    def __init__(self, net: RailNetwork, bits: np.ndarray, max_stops: int = 2) -> None:
+        self.net = net
+        self.size = len(net.connections)
+        self.bits = bits
+        self.n = bits.shape[1]
+        self.max_stops = max_stops
+        self._rows = QueryCache(maxsize=64)
+
+    # true when connections were added to the network after the table was built
+    def stale(self) -> bool:
+        return self.size != len(self.net.connections)
+
+    @classmethod
+    def build(cls, net: RailNetwork, max_stops: int = 2, cache_dir: Optional[Path] = None,
+              workers: Optional[int] = None) -> "ReachabilityTable":
+        path = None
+        if cache_dir is not None:
+            path = Path(cache_dir) / f"{timetable_hash(net, max_stops)}.npz"
+            if path.exists():
+                with np.load(path) as data:
+                    return cls(net, data["bits"], max_stops)
+
+        n = len(net.cities)
+        if workers == 1 or n < 2:
+            rows = [_reach_bits_from(net, o, max_stops) for o in range(n)]
+        else:
+            # one task per origin city, the workers already hold the network and only send back packed bits
+            with network_pool(net, workers) as pool:
+                rows = list(pool.map(_worker_reach_bits_from, range(n), repeat(max_stops),
+                                     chunksize=max(1, n // 64)))
+
+        bits = np.zeros((8, n, (n + 7) // 8), dtype=np.uint8)
+        for o, row in enumerate(rows):
+            bits[:, o] = row
+
+        if path is not None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # written under a temporary name first so a concurrent reader never sees half a file
+            tmp = path.with_name(f"{path.stem}.{os.getpid()}.tmp.npz")
+            np.savez_compressed(tmp, bits=bits)
+            os.replace(tmp, path)
+        return cls(net, bits, max_stops)
+
+    # True/False, or None when one of the cities is not in the network
+    def reachable(self, from_city: str, to_city: str, weekday: Optional[int] = None) -> Optional[bool]:
+        cell = self._cell(from_city, to_city, weekday)
+        if cell is None:
+            return None
+        day, origin, target = cell
+        return bool(self.bits[day, origin, target >> 3] >> (7 - (target & 7)) & 1)
+
+    # same question for every pair of cities whose names contain the patterns, i.e. the cities search_connections
+    # matches: True if any of these pairs is joined by a route, None when a pattern matches no city
+    def reachable_any(self, from_pattern: str, to_pattern: str, weekday: Optional[int] = None) -> Optional[bool]:
+        origins = [c.id for c in self.net.cities.search(from_pattern) if c.id < self.n]
+        targets = [c.id for c in self.net.cities.search(to_pattern) if c.id < self.n]
+        if not origins or not targets:
+            return None
+        day = ANY_DAY if weekday is None else weekday
+        return bool(np.unpackbits(self.bits[day, origins], axis=-1, count=self.n)[:, targets].any())
+
+    # one flag per city id: True for the cities that can reach the target city id, which is what bounds the
+    # indirect route search (RailNetwork.find_indirect_connections)
+    def reaching(self, target: int, weekday: Optional[int] = None) -> np.ndarray:
+        day = ANY_DAY if weekday is None else weekday
+        return (self.bits[day, :, target >> 3] >> (7 - (target & 7)) & 1).astype(bool)
+
+    # shortest total time (travel + waiting) in minutes, None if there is no route
+    def min_minutes(self, from_city: str, to_city: str, weekday: Optional[int] = None) -> Optional[int]:
+        return self._best(from_city, to_city, weekday, 0)
+
+    # fewest changes of train (0 = direct), None if there is no route
+    def min_transfers(self, from_city: str, to_city: str, weekday: Optional[int] = None) -> Optional[int]:
+        return self._best(from_city, to_city, weekday, 1)
+
+    def _best(self, from_city: str, to_city: str, weekday: Optional[int], which: int) -> Optional[int]:
+        cell = self._cell(from_city, to_city, weekday)
+        if cell is None:
+            return None
+        day, origin, target = cell
+        rows = self._rows.get_or_compute(origin, 0, lambda: _reach_from(self.net, origin, self.max_stops))
+        value = rows[which][day, target]
+        return None if value == UNREACHABLE else int(value)
+
+    def _cell(self, from_city: str, to_city: str, weekday: Optional[int]):
+        origin = self.net.cities.find(from_city)
+        target = self.net.cities.find(to_city)
+        if origin is None or target is None or max(origin.id, target.id) >= self.n:
+            return None
+        day = ANY_DAY if weekday is None else weekday
+        return day, origin.id, target.id
+
+
+# returns the reachability table of the network, building it (or loading it from the cache dir, when one is given)
+# on first use and again once connections were added
+def reachability_for(net: RailNetwork, max_stops: int = 2, cache_dir: Optional[Path] = None,
+                     workers: Optional[int] = None) -> ReachabilityTable:
+    table = net._routers.get(ReachabilityTable)
+    if table is None or table.stale() or table.max_stops != max_stops:
+        table = net._routers[ReachabilityTable] = ReachabilityTable.build(net, max_stops, cache_dir, workers)
+    return table
+
+# hash of everything the tables depend on: the connections, the search depth and the layover rules
+def timetable_hash(net: RailNetwork, max_stops: int = 2) -> str:
+    h = hashlib.sha256(f"{_FORMAT}|{max_stops}|{MIN_LAYOVER}|{MAX_DAY_LAYOVER}|{MAX_NIGHT_LAYOVER}|".encode())
+    city_names, _, rows = snapshot(net)
+    h.update(repr((city_names, rows)).encode())
+    return h.hexdigest()[:32]
+
+
+def _worker_reach_bits_from(origin: int, max_stops: int):
+    return _reach_bits_from(worker_network(), origin, max_stops)
+
+# one row of the table: the cities reached from the origin on each day, packed to bits
+def _reach_bits_from(net: RailNetwork, origin: int, max_stops: int) -> np.ndarray:
+    minutes, _ = _reach_from(net, origin, max_stops)
+    return np.packbits(minutes != UNREACHABLE, axis=-1)
+
+# the shortest time and fewest transfers from the origin (a city id) to every city id, per day: every route is
+# followed leg by leg, keeping the days all its legs run on, and recorded at the city each leg arrives at.
+# what can follow a leg only depends on the leg itself, so a route is not followed further when another route
+# already arrived by the same connection with no more changes, in no more time, on all of its days
+# (seen[connection id] holds the (changes, days, total) of the routes followed through that connection)
+def _reach_from(net: RailNetwork, origin: int, max_stops: int):
+    n = len(net.cities)
+    minutes = [[UNREACHABLE] * n for _ in range(8)]
+    transfers = [[UNREACHABLE] * n for _ in range(8)]
+    max_changes = max(max_stops, 1)
+    seen: dict[int, list[tuple[int, int, int]]] = {}
+
+    def expand(conn, days: int, total: int, changes: int) -> None:
+        v = conn.arr_city.id
+        for d in (*weekdays(days), ANY_DAY):
+            m = minutes[d]
+            if m[v] == UNREACHABLE or total < m[v]:
+                m[v] = total
+            t = transfers[d]
+            if t[v] == UNREACHABLE or changes < t[v]:
+                t[v] = changes
+        if changes == max_changes:
+            return
+        labels = seen.setdefault(conn.id, [])
+        if any(k <= changes and ds & days == days and m <= total for k, ds, m in labels):
+            return
+        labels.append((changes, days, total))
+        for nxt in conn.arr_city.departures:
+            if layover_ok_minutes(conn.arr_min, nxt.dep_min):
+                wait = wait_minutes(conn.arr_min, nxt.dep_min)
+                expand(nxt, common_days(days, nxt.days_mask), total + wait + nxt.trip_minutes, changes + 1)
+
+    for c in net.cities[origin].departures:
+        expand(c, c.days_mask, c.trip_minutes, 0)
+    return np.array(minutes, dtype=np.int32), np.array(transfers, dtype=np.int8)
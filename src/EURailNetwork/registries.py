@@ -1,9 +1,15 @@
 from __future__ import annotations
 from dataclasses import dataclass, field
 import sqlite3
-from typing import Dict
+from typing import ClassVar, Dict, Generic, TypeVar
+
+import numpy as np
 
 from .models import City, Train, Connection, Traveller, Trip, Reservation, Ticket
+from .cache import CacheStats, QueryCache
+from .columnar import ConnectionTable
+from .ngrams import NGramIndex
+from .schema import weekdays
 
 from datetime import time
 import unicodedata
@@ -12,7 +18,8 @@ import random
 import string
 
 
-# this function helps normalize the data by trimming and collapsing spaces
+# this function helps normalize the data by trimming and collapsing spaces. it is the only normalization of city and
+# train names: registries compute it once per entity (City.key / Train.key) and once per query string
 def norm_name(name: str) -> str:
     """Normalize a name for reliable matching (case-insensitive, no accents or extra spaces)."""
     if not name:
@@ -21,37 +28,93 @@ def norm_name(name: str) -> str:
     name = "".join(c for c in name if not unicodedata.combining(c))
     return " ".join(name.strip().split()).casefold()
 
-# class cities holds a list and a dictionnary of cities from which it can fetch specific ones or create ones based on names
+E = TypeVar("E", City, Train)
+
+# class registry interns the entities of one kind (cities or trains) by normalized name. every entity gets a dense
+# integer id, its position in items, so id -> entity is a list index, name -> entity a dict lookup and entity -> id
+# an attribute, and data about the entities can be kept in plain arrays indexed by id (see array())
+# the names are also added to a trigram index so partial name searches don't have to normalize every entity
 @dataclass
-class Cities:
-    by_key: Dict[str, City] = field(default_factory=dict)
-    items: list[City] = field(default_factory=list)
+class Registry(Generic[E]):
+    kind: ClassVar[type]
+    by_key: Dict[str, E] = field(default_factory=dict)
+    items: list[E] = field(default_factory=list)
+    names: NGramIndex = field(default_factory=NGramIndex, repr=False, compare=False)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    # the entity with this id
+    def __getitem__(self, id_: int) -> E:
+        return self.items[id_]
 
-    def get_or_create(self, name: str) -> City:
+    def get_or_create(self, name: str) -> E:
         key = norm_name(name)
         found = self.by_key.get(key)
-        if found:
+        if found is not None:
             return found
-        obj = City(name=name.strip())
-        self.by_key[key] = obj
-        self.items.append(obj)
-        return obj
-
-@dataclass
-class Trains:
-    by_key: Dict[str, Train] = field(default_factory=dict)
-    items: list[Train] = field(default_factory=list)
+        return self._intern(self.kind(name=name.strip()), key)
 
-    def get_or_create(self, name: str) -> Train:
-        key = norm_name(name)
+    # registers an entity that was created outside of the registry (e.g. City("Paris") in a test)
+    def add(self, obj: E) -> E:
+        key = norm_name(obj.name)
         found = self.by_key.get(key)
-        if found:
+        if found is obj:
+            return obj
+        if found is not None:
+            raise ValueError(f"Another {self.kind.__name__} is already registered as {obj.name!r}")
+        if obj.id != -1:
+            raise ValueError(f"{self.kind.__name__} {obj.name!r} belongs to another registry")
+        return self._intern(obj, key)
+
+    # true if this very entity was interned by this registry (an O(1) check by id)
+    def owns(self, obj: E) -> bool:
+        return 0 <= obj.id < len(self.items) and self.items[obj.id] is obj
+
+    # the entity of this registry to use for obj: obj itself if it is registered here or not registered anywhere yet,
+    # otherwise the entity already registered under its name, or a new one with that name (get_or_create). this is
+    # how entities built by hand or taken from another network are resolved when their connection is added
+    def resolve(self, obj: E) -> E:
+        if self.owns(obj):
+            return obj
+        found = self.find(obj.name)
+        if found is not None:
             return found
-        obj = Train(name=name.strip())
+        if obj.id == -1:
+            return self._intern(obj, norm_name(obj.name))
+        return self.get_or_create(obj.name)
+
+    def _intern(self, obj: E, key: str) -> E:
+        obj.key = key
+        obj.id = len(self.items)
         self.by_key[key] = obj
         self.items.append(obj)
+        self.names.add(key)
         return obj
 
+    # the entity with exactly this name (after normalization), or None
+    def find(self, name: str) -> Optional[E]:
+        return self.by_key.get(norm_name(name))
+
+    # id of the entity with exactly this name, or None
+    def id_of(self, name: str) -> Optional[int]:
+        found = self.find(name)
+        return None if found is None else found.id
+
+    # entities whose name contains the pattern (case-insensitive), in the order they were created
+    def search(self, pattern: str) -> list[E]:
+        return [self.items[i] for i in self.names.search(norm_name(pattern))]
+
+    # a new array with one slot per entity, indexed by id
+    def array(self, dtype=np.int64, fill=0) -> np.ndarray:
+        return np.full(len(self.items), fill, dtype=dtype)
+
+class Cities(Registry[City]):
+    kind = City
+
+class Trains(Registry[Train]):
+    kind = Train
+
 # this is the class that models the system. it holds all cities, trains, and connections. this method adds a new 
 # connection to the system as it reads the csv file and updates the departure and arrival cities and train type.
 @dataclass
@@ -59,8 +122,33 @@ class RailNetwork:
     cities: Cities = field(default_factory=Cities)
     trains: Trains = field(default_factory=Trains)
     connections: list[Connection] = field(default_factory=list)
+    # adjacency by city id: dep_city.id -> arr_city.id -> connections between the two, in insertion order.
+    # it is kept up to date by add_connection and shared by find_direct and the routing methods
+    # (all departures of a city are in city.departures)
+    adjacency: Dict[int, Dict[int, list[Connection]]] = field(default_factory=dict, init=False, repr=False, compare=False)
+    # the same connections bucketed by weekday (0..6): (dep_city.id, arr_city.id) -> 7 lists
+    _pairs_by_day: Dict[tuple[int, int], list[list[Connection]]] = field(default_factory=dict, init=False, repr=False, compare=False)
+    # columnar copy of the connections (row i == connections[i]) used for vectorized filtering
+    table: ConnectionTable = field(default_factory=ConnectionTable, init=False, repr=False, compare=False)
+    # routers of routing.py by class, built on their first query and rebuilt once connections are added
+    _routers: Dict[type, object] = field(default_factory=dict, init=False, repr=False, compare=False)
+    # bumped by every add_connection, so cached query results can tell they are out of date
+    _version: int = field(default=0, init=False, repr=False, compare=False)
+    # optional LRU cache of search_connections / find_direct results, see enable_query_cache
+    _query_cache: Optional[QueryCache] = field(default=None, init=False, repr=False, compare=False)
 
     def add_connection(self, conn: Connection) -> None:
+        if conn.id != -1:
+            raise ValueError(f"Connection {conn.route_id} was already added to a network (id {conn.id})")
+        # cities and trains built by hand or taken from another network are resolved to the entities of this one
+        # here, everything below is keyed by their ids
+        conn.dep_city = self.cities.resolve(conn.dep_city)
+        conn.arr_city = self.cities.resolve(conn.arr_city)
+        conn.train = self.trains.resolve(conn.train)
+        self._version += 1
+        # the id is the position in self.connections, which is also the row in self.table
+        conn.id = len(self.connections)
+        self.table.append(conn)
         self.connections.append(conn)
         # from the network you can find all connections. 
         # from a city you can see all the trains that arrive and depart. 
@@ -68,30 +156,66 @@ class RailNetwork:
         conn.dep_city.departures.append(conn)
         conn.arr_city.arrivals.append(conn)
         conn.train.connections.append(conn)
+
+        # keep the pair index up to date so find_direct never has to scan the whole network
+        pair = (conn.dep_city.id, conn.arr_city.id)
+        self.adjacency.setdefault(pair[0], {}).setdefault(pair[1], []).append(conn)
+        buckets = self._pairs_by_day.get(pair)
+        if buckets is None:
+            buckets = self._pairs_by_day[pair] = [[] for _ in range(7)]
+        for d in weekdays(conn.days_mask):
+            buckets[d].append(conn)
     
     # this method is called by the test for search and sort to validate that everyhting works well
     # for the search of items
     def find_direct(self, depart_city: str, arrival_city: str, weekday: int | None = None):
-        def _norm(s: str): return " ".join(s.strip().split()).casefold()
-        dep_k, arr_k = _norm(depart_city), _norm(arrival_city)
-        return [
-            c for c in self.connections
-            if _norm(c.dep_city.name) == dep_k
-            and _norm(c.arr_city.name) == arr_k
-            and (weekday is None or weekday in c.days)
-        ]
+        dep, arr = self.cities.find(depart_city), self.cities.find(arrival_city)
+        if dep is None or arr is None:
+            return []
+        pair = (dep.id, arr.id)
+        if self._query_cache is None:
+            return list(self._direct(pair, weekday))
+        found = self._query_cache.get_or_compute(("direct", pair, weekday), self._version,
+                                                 lambda: tuple(self._direct(pair, weekday)))
+        return list(found)
+
+    def _direct(self, pair: tuple[int, int], weekday: int | None):
+        if weekday is None:
+            return self.adjacency.get(pair[0], {}).get(pair[1], ())
+        buckets = self._pairs_by_day.get(pair)
+        if buckets is None or not 0 <= weekday < 7:
+            return ()
+        return buckets[weekday]
+
+    # true if this very connection object was added to the network (an O(1) check by id)
+    def has_connection(self, conn: Connection) -> bool:
+        conns = self.connections
+        return 0 <= conn.id < len(conns) and conns[conn.id] is conn
+
+    # turns on (or resizes, emptying it) the LRU cache in front of search_connections and find_direct.
+    # results are cached per normalized query and dropped as soon as a connection is added
+    def enable_query_cache(self, maxsize: int = 256) -> QueryCache:
+        self._query_cache = QueryCache(maxsize)
+        return self._query_cache
+
+    def disable_query_cache(self) -> None:
+        self._query_cache = None
+
+    # hits, misses, evictions and size of the query cache (None when it is off)
+    def query_cache_stats(self) -> Optional[CacheStats]:
+        return None if self._query_cache is None else self._query_cache.stats()
 
     # this method is called by the test for search and sort to validate that everyhting works well 
     # for the sorting of the connections
     @staticmethod
     def sort_connections(conns, by: str, ascending: bool = True, price_class: str | None = None):
         if by == "trip_minutes":
-            key = lambda c: (c.trip_minutes, c.dep_time, c.route_id)
+            key = lambda c: (c.trip_minutes, c.dep_min, c.route_id)
         elif by == "price":
-            key = (lambda c: (c.first_class_eur, c.dep_time, c.route_id)) if price_class == "first" \
-                else (lambda c: (c.second_class_eur, c.dep_time, c.route_id))
+            key = (lambda c: (c.first_class_eur, c.dep_min, c.route_id)) if price_class == "first" \
+                else (lambda c: (c.second_class_eur, c.dep_min, c.route_id))
         elif by == "dep_time":
-            key = lambda c: (c.dep_time, c.route_id)
+            key = lambda c: (c.dep_min, c.route_id)
         else:
             raise ValueError(f"Unsupported sort key: {by}")
         return sorted(conns, key=key, reverse=not ascending)
@@ -116,131 +240,123 @@ class RailNetwork:
         ascending: bool = True
     ) -> list[Connection]:
 
-        results = self.connections.copy()
-
-        # Filter by departure city
-        if depart_city:
-            dep_pattern = norm_name(depart_city)
-            results = [c for c in results if dep_pattern in norm_name(c.dep_city.name)]
-        if arrival_city:
-            arr_pattern = norm_name(arrival_city)
-            results = [c for c in results if arr_pattern in norm_name(c.arr_city.name)]
-
-        # Filter by train type
-        # Exact same logic as depart_city case
-        if train_type:
-            t_pattern = norm_name(train_type)
-            results = [c for c in results if t_pattern in norm_name(c.train.name)]
-
-        # Filter by first class price
-        # Client can provide 2 first class prices: min and max, and the system will fetch connections between these 2 prices
-        if min_first_class_price is not None:
-            results = [c for c in results if min_first_class_price <= c.first_class_eur]
-        if max_first_class_price is not None:
-            results = [c for c in results if c.first_class_eur <= max_first_class_price]
-        if min_second_class_price is not None:
-            results = [c for c in results if min_second_class_price <= c.second_class_eur]
-        if max_second_class_price is not None:
-            results = [c for c in results if c.second_class_eur <= max_second_class_price]
-
-        # Time filters
-        if min_departure_time is not None:
-            results = [c for c in results if min_departure_time <= c.dep_time]
-        if max_departure_time is not None:
-            results = [c for c in results if c.dep_time <= max_departure_time]
-        if min_arrival_time is not None:
-            results = [c for c in results if min_arrival_time <= c.arr_time]
-        if max_arrival_time is not None:
-            results = [c for c in results if c.arr_time <= max_arrival_time]
-
-        # Duration filters
-        if min_duration is not None:
-            results = [c for c in results if min_duration <= c.trip_minutes]
-        if max_duration is not None:
-            results = [c for c in results if c.trip_minutes <= max_duration]
-
-        # Weekday filter
-        if weekday is not None:
-            results = [c for c in results if weekday in c.days]
-
-        # Sorting
-        if sort_by == "dep_city":
-            key = lambda c: (c.dep_city.name.lower(), c.dep_time, c.route_id)
-        elif sort_by == "arr_city":
-            key = lambda c: (c.arr_city.name.lower(), c.dep_time, c.route_id)
-        elif sort_by == "train_name":
-            key = lambda c: (c.train.name.lower(), c.dep_time, c.route_id)
-        elif sort_by == "first_class_eur":
-            key = lambda c: (c.first_class_eur, c.dep_time, c.route_id)
-        elif sort_by == "second_class_eur":
-            key = lambda c: (c.second_class_eur, c.dep_time, c.route_id)
-        elif sort_by == "dep_time":
-            key = lambda c: (c.dep_time, c.arr_time, c.route_id)
-        elif sort_by == "arr_time":
-            key = lambda c: (c.arr_time, c.dep_time, c.route_id)
-        elif sort_by == "trip_minutes":
-            key = lambda c: (c.trip_minutes, c.dep_time, c.route_id)
-        else:
-            key = lambda c: (c.dep_time, c.route_id)
-
-        return sorted(results, key=key, reverse=not ascending)
+        # all the filtering and sorting is done by the query engine in a single pass over the best index
+        from .query import ConnectionQuery
+        query = ConnectionQuery(
+            depart_city=depart_city,
+            arrival_city=arrival_city,
+            train_type=train_type,
+            min_first_class_price=min_first_class_price,
+            max_first_class_price=max_first_class_price,
+            min_second_class_price=min_second_class_price,
+            max_second_class_price=max_second_class_price,
+            min_departure_time=min_departure_time,
+            max_departure_time=max_departure_time,
+            min_arrival_time=min_arrival_time,
+            max_arrival_time=max_arrival_time,
+            min_duration=min_duration,
+            max_duration=max_duration,
+            weekday=weekday,
+            sort_by=sort_by,
+            ascending=ascending,
+        )
+        if self._query_cache is None:
+            return query.run(self)
+        found = self._query_cache.get_or_compute(("search", query.cache_key()), self._version,
+                                                 lambda: tuple(query.run(self)))
+        return list(found)
 
     # --- Indirect Connections (1-stop and 2-stop) ---
-    def find_indirect_connections(self, from_city: str, to_city: str, max_stops: int = 2):
+    def find_indirect_connections(self, from_city: str, to_city: str, max_stops: int = 2, **filters):
         """
         Find all possible 1-stop and 2-stop routes between two cities.
         Includes waiting times and supports next-day departures.
+        Only bookable routes are returned: a change that breaks the layover rules (utils_time.layover_ok_minutes,
+        also used by Trip.validate_layover) is pruned as soon as it is expanded.
+        The keyword filters of search_connections (train_type, prices, departure/arrival times, weekday) can be given
+        and must hold for every leg; min_duration/max_duration apply to the total route time. They are checked while
+        the legs are expanded, so a branch that fails them is never explored.
+        Once a reachability table was built for the network (reachability.reachability_for), a first leg is only
+        followed when the city it arrives at can still reach the destination.
         """
-        from .utils_time import calculate_wait_time
+        from .utils_time import layover_ok_minutes, wait_minutes
         results = []
 
-        from_key = norm_name(from_city)
-        to_key = norm_name(to_city)
-        
-        adj = {}
-        for c in self.connections:
-            dep = norm_name(c.dep_city.name)
-            adj.setdefault(dep, []).append(c)
+        origin = self.cities.find(from_city)
+        target = self.cities.find(to_city)
+        if origin is None or target is None:
+            return []
+        leg_ok, min_total, max_total = self._route_filters(filters)
+        reach = self._reaching(target, max_stops, filters.get("weekday"))
+        if reach is not None and not reach(origin):
+            return []
+        adj = self.adjacency
+        to_target = lambda city: adj.get(city.id, {}).get(target.id, ())
+        too_long = lambda minutes: max_total is not None and minutes > max_total
+        keep = lambda total: (min_total is None or total >= min_total) and not too_long(total)
+        firsts = [c for c in origin.departures
+                  if (leg_ok is None or leg_ok(c)) and (reach is None or reach(c.arr_city))]
 
         # --- 1-STOP (A → B → C) ---
-        if from_key in adj:
-            for c1 in adj[from_key]:
-                mid_key = norm_name(c1.arr_city.name)
-                if mid_key not in adj:
+        for c1 in firsts:
+            for c2 in to_target(c1.arr_city):
+                if not layover_ok_minutes(c1.arr_min, c2.dep_min) or (leg_ok and not leg_ok(c2)):
                     continue
-                for c2 in adj[mid_key]:
-                    if norm_name(c2.arr_city.name) == to_key:
-                        wait = calculate_wait_time(c1.arr_time, c2.dep_time)
-                        total = c1.trip_minutes + c2.trip_minutes + wait
-                        results.append({
-                            "segments": [c1, c2],
-                            "wait_times": [wait],
-                            "total_minutes": total,
-                        })
+                wait = wait_minutes(c1.arr_min, c2.dep_min)
+                total = c1.trip_minutes + c2.trip_minutes + wait
+                if not keep(total):
+                    continue
+                results.append({
+                    "segments": [c1, c2],
+                    "wait_times": [wait],
+                    "total_minutes": total,
+                })
 
         # --- 2-STOP (A → B → C → D) ---
-        if max_stops >= 2 and from_key in adj:
-            for c1 in adj[from_key]:
-                mid1_key = norm_name(c1.arr_city.name)
-                if mid1_key not in adj:
-                    continue
-                for c2 in adj[mid1_key]:
-                    mid2_key = norm_name(c2.arr_city.name)
-                    if mid2_key not in adj:
+        # meet in the middle: the last legs are taken backward from the destination's arrivals and grouped by their
+        # departure city C, so a middle leg B → C is only looked at when C actually has a train to the destination
+        if max_stops >= 2:
+            lasts: Dict[int, list[Connection]] = {}
+            for c3 in target.arrivals:
+                if leg_ok is None or leg_ok(c3):
+                    lasts.setdefault(c3.dep_city.id, []).append(c3)
+            middles: Dict[int, list[Connection]] = {}  # B.id -> joinable B → C legs, in B.departures order
+
+            for c1 in firsts:
+                b = c1.arr_city
+                joinable = middles.get(b.id)
+                if joinable is None:
+                    out = adj.get(b.id, {})
+                    if len(out) < len(lasts):
+                        joinable = [c for c_id, cs in out.items() if c_id in lasts for c in cs]
+                    else:
+                        joinable = [c for c_id in lasts for c in out.get(c_id, ())]
+                    if leg_ok is not None:
+                        joinable = [c for c in joinable if leg_ok(c)]
+                    joinable.sort(key=lambda c: c.id)
+                    middles[b.id] = joinable
+                for c2 in joinable:
+                    # the first change is checked before looking at any third leg
+                    if not layover_ok_minutes(c1.arr_min, c2.dep_min):
                         continue
-                    for c3 in adj[mid2_key]:
-                        if norm_name(c3.arr_city.name) == to_key:
-                            wait1 = calculate_wait_time(c1.arr_time, c2.dep_time)
-                            wait2 = calculate_wait_time(c2.arr_time, c3.dep_time)
-                            total = (
-                                c1.trip_minutes + c2.trip_minutes + c3.trip_minutes
-                                + wait1 + wait2
-                            )
-                            results.append({
-                                "segments": [c1, c2, c3],
-                                "wait_times": [wait1, wait2],
-                                "total_minutes": total,
-                            })
+                    wait1 = wait_minutes(c1.arr_min, c2.dep_min)
+                    if too_long(c1.trip_minutes + c2.trip_minutes + wait1):
+                        continue
+                    for c3 in lasts[c2.arr_city.id]:
+                        if not layover_ok_minutes(c2.arr_min, c3.dep_min) or (leg_ok and not leg_ok(c3)):
+                            continue
+                        wait2 = wait_minutes(c2.arr_min, c3.dep_min)
+                        total = (
+                            c1.trip_minutes + c2.trip_minutes + c3.trip_minutes
+                            + wait1 + wait2
+                        )
+                        if not keep(total):
+                            continue
+                        results.append({
+                            "segments": [c1, c2, c3],
+                            "wait_times": [wait1, wait2],
+                            "total_minutes": total,
+                        })
 
         # --- Deduplicate routes ---
         unique = []
@@ -254,9 +370,134 @@ class RailNetwork:
         #print(f"DEBUG: Found {len(unique)} indirect route(s) from {from_city} → {to_city}")
         return unique
 
-# helper method for normalizing the name input
-def norm_name(name: str) -> str:
-    return name.strip().lower()
+    # the check "can this city still reach the target" of the reachability table built for the network, or None when
+    # there is no up-to-date table (see reachability.reachability_for) or it was built for fewer changes
+    def _reaching(self, target: City, max_stops: int, weekday: Optional[int]):
+        from .reachability import ReachabilityTable
+        table = self._routers.get(ReachabilityTable)
+        if (table is None or table.stale() or max(table.max_stops, 1) < max(max_stops, 1) or target.id >= table.n
+                or weekday is not None and not 0 <= weekday < 7):
+            return None
+        reaching = table.reaching(target.id, weekday)
+        return lambda city: city.id < len(reaching) and bool(reaching[city.id])
+
+    # splits the search_connections filters given to an indirect search into a per-leg check and the total duration bounds
+    def _route_filters(self, filters: dict):
+        from .query import ConnectionQuery
+        not_leg_filters = {"depart_city", "arrival_city", "sort_by", "ascending"} & filters.keys()
+        if not_leg_filters:
+            raise TypeError(f"Unsupported filter(s) for indirect routes: {', '.join(sorted(not_leg_filters))}")
+        query = ConnectionQuery(**filters)
+        return query.leg_filter(self), query.min_duration, query.max_duration
+
+    def find_indirect_batch(self, queries, max_stops: int = 2, workers: int | None = None, **filters):
+        """
+        Answer many (from_city, to_city, weekday) queries with find_indirect_connections in a process pool
+        (see parallel.route_batch). Yields the list of routes of each query, in the order of the queries.
+        """
+        from .parallel import route_batch
+        return route_batch(self, queries, max_stops=max_stops, workers=workers, **filters)
+
+    # --- Indirect Connections, cheapest first ---
+    def iter_indirect_connections(self, from_city: str, to_city: str, max_stops: int = 2, cost: str = "total_minutes",
+                                  **filters):
+        """
+        Lazily yield the same bookable 1-stop and 2-stop routes as find_indirect_connections, in increasing cost:
+        "total_minutes" (travel + waiting time), "first_class_eur" or "second_class_eur".
+        Partial routes are expanded best-first from a heap; since every extra leg only adds to the cost,
+        a complete route popped from the heap is cheaper than anything still to come, so it is yielded right away
+        and route dicts are only built for the routes the caller actually consumes.
+        Takes the same keyword filters as find_indirect_connections, and is bounded by the reachability table in the
+        same way: a leg is only followed when its arrival city is the destination or can still reach it.
+        """
+        import heapq
+        from itertools import count
+        from .utils_time import layover_ok_minutes, wait_minutes
+
+        if cost == "total_minutes":
+            fare_of = None
+        elif cost in ("first_class_eur", "second_class_eur"):
+            fare_of = lambda c: getattr(c, cost)
+        else:
+            raise ValueError(f"Unsupported cost: {cost}")
+
+        origin = self.cities.find(from_city)
+        target = self.cities.find(to_city)
+        if origin is None or target is None:
+            return
+        leg_ok, min_total, max_total = self._route_filters(filters)
+        reach = self._reaching(target, max_stops, filters.get("weekday"))
+        if reach is not None and not reach(origin):
+            return
+        useful = lambda c: reach is None or c.arr_city is target or reach(c.arr_city)
+        adj = self.adjacency
+        max_legs = max(max_stops, 1) + 1
+
+        # heap entries: (cost, tie-breaker, legs, waits, total minutes, fare)
+        heap = []
+        tie = count()
+        def push(legs, waits, minutes, fare):
+            heapq.heappush(heap, (minutes if fare_of is None else fare, next(tie), legs, waits, minutes, fare))
+
+        for c1 in origin.departures:
+            if (leg_ok is None or leg_ok(c1)) and useful(c1):
+                push((c1,), (), c1.trip_minutes, fare_of(c1) if fare_of else 0)
+
+        seen = set()
+        while heap:
+            _, _, legs, waits, minutes, fare = heapq.heappop(heap)
+            last = legs[-1]
+            if len(legs) >= 2 and last.arr_city is target:
+                key = tuple(seg.route_id for seg in legs)
+                if key not in seen and (min_total is None or minutes >= min_total):
+                    seen.add(key)
+                    yield {"segments": list(legs), "wait_times": list(waits), "total_minutes": minutes}
+                continue
+            # the last leg allowed has to reach the destination, earlier ones can go anywhere
+            if len(legs) == max_legs - 1:
+                nexts = adj.get(last.arr_city.id, {}).get(target.id, ())
+            else:
+                nexts = last.arr_city.departures
+            for c in nexts:
+                if not layover_ok_minutes(last.arr_min, c.dep_min) or (leg_ok and not leg_ok(c)) or not useful(c):
+                    continue
+                wait = wait_minutes(last.arr_min, c.dep_min)
+                if max_total is not None and minutes + wait + c.trip_minutes > max_total:
+                    continue
+                push(legs + (c,), waits + (wait,), minutes + wait + c.trip_minutes,
+                     fare + fare_of(c) if fare_of else 0)
+
+    def top_indirect_connections(self, from_city: str, to_city: str, k: int, max_stops: int = 2,
+                                 cost: str = "total_minutes", **filters) -> list[dict]:
+        """The k cheapest indirect routes (see iter_indirect_connections); the search stops after the k-th one."""
+        from itertools import islice
+        routes = self.iter_indirect_connections(from_city, to_city, max_stops=max_stops, cost=cost, **filters)
+        return list(islice(routes, k))
+
+    # --- Earliest arrival (any number of transfers) ---
+    def earliest_arrival(self, from_city: str, to_city: str, depart_after: time, weekday: int, max_days: int = 2):
+        """
+        Earliest arrival at to_city when leaving from_city at or after depart_after on the given weekday,
+        with any number of changes that follow the layover rules (Connection Scan Algorithm, see routing.py).
+        Returns a route dict like find_indirect_connections (plus "arrival_minutes"), or None if unreachable
+        within max_days days.
+        """
+        from .routing import ConnectionScanRouter, router_for
+        return router_for(self, ConnectionScanRouter).earliest_arrival(
+            from_city, to_city, depart_after, weekday, max_days=max_days)
+
+    # --- Pareto-optimal journeys (arrival time, fare, transfers) ---
+    def plan_journeys(self, from_city: str, to_city: str, depart_after: time, weekday: int,
+                      price_class: str = "second", max_transfers: int = 3, max_days: int = 2) -> list[dict]:
+        """
+        Journeys from from_city (leaving at or after depart_after on the given weekday) to to_city that are not beaten
+        on all three of arrival time, total fare in price_class ("first" or "second") and number of transfers.
+        Sorted by arrival; each route dict also has "arrival_minutes", "fare" and "transfers".
+        """
+        from .routing import ParetoPlanner, router_for
+        return router_for(self, ParetoPlanner).plan(
+            from_city, to_city, depart_after, weekday, price_class=price_class,
+            max_transfers=max_transfers, max_days=max_days)
 
 @dataclass
 class Travellers:
@@ -362,6 +603,8 @@ class BookingSystem:
     travellers: Travellers = field(default_factory=Travellers)
     trips: Trips = field(default_factory=Trips)
     db_connection: sqlite3.Connection = None
+    # db ids of the network's connections by Connection.id, from save_network (looked up on first save otherwise)
+    db_connection_ids: Optional[list] = field(default=None, repr=False)
 
     # This is the method that will generate an alphanumeric ID for every trip
     # Moved from models.py
@@ -377,7 +620,7 @@ class BookingSystem:
 
         # validate connection - Connection selected need to exist to be booked and to create a trip
         for c in connections:
-            if c not in self.railNetwork.connections:
+            if not self.railNetwork.has_connection(c):
                 raise ValueError("Connection not found in rail network") # If there are no connections, stop here and raise error
         
         # validate layover duration with a temporary trip id (trip layover needs to be validated before its id is generated)
@@ -457,6 +700,7 @@ class BookingSystem:
             # Save connections
             for conn in trip.connections:
                 trip_data["connections"].append({
+                    "id": conn.id,
                     "route_id": conn.route_id,
                     "dep_city": conn.dep_city.name,
                     "arr_city": conn.arr_city.name,
@@ -487,8 +731,10 @@ class BookingSystem:
             return
         
         try:
-            from EURailNetwork.db_sqlite import save_trip
-            save_trip(db_connection, trip)
+            from EURailNetwork.db_sqlite import connection_db_ids, save_trip
+            if self.db_connection_ids is None:
+                self.db_connection_ids = connection_db_ids(db_connection, self.railNetwork)
+            save_trip(db_connection, trip, self.db_connection_ids)
             print(f"Trip {trip.id} successfully saved to database.")
         except Exception as e:
                 print(f"Error: Could not save trip to database - {e}")
@@ -521,11 +767,18 @@ class BookingSystem:
             # Load trips
             for trip_data in data.get("trips", []):
                 route_id = trip_data["connections"][0]["route_id"]
+                conn_id = trip_data["connections"][0].get("id")
+                connections = self.railNetwork.connections
                 connection = None
-                for conn in self.railNetwork.connections:
-                    if conn.route_id == route_id:
-                        connection = conn
-                        break
+                # saved by id, checked against the route id in case the network was loaded from another file
+                if isinstance(conn_id, int) and 0 <= conn_id < len(connections) \
+                        and connections[conn_id].route_id == route_id:
+                    connection = connections[conn_id]
+                else:
+                    for conn in connections:
+                        if conn.route_id == route_id:
+                            connection = conn
+                            break
                 
                 if connection is None:
                     continue 
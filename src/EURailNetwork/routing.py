@@ -0,0 +1,258 @@
+from __future__ import annotations
+from bisect import bisect_left, bisect_right
+from datetime import time
+from typing import Optional
+
+from .registries import RailNetwork
+from .utils_time import DAY_MINUTES as DAY, MAX_DAY_LAYOVER, MIN_LAYOVER, layover_ok_minutes, to_minutes
+INF = float("inf")
+
+
+# both routers below are read-only views of the network built from its columnar table
+class _TableView:
+    def __init__(self, net: RailNetwork) -> None:
+        self.net = net
+        self.size = len(net.table)
+        self.n_cities = len(net.cities)
+
+    # true when connections were added to the network after this view was built
+    def stale(self) -> bool:
+        return self.size != len(self.net.table)
+
+    def _city_id(self, name: str) -> Optional[int]:
+        city = self.net.cities.find(name)
+        # a city created after this view was built has no connection in it yet
+        return None if city is None or city.id >= self.n_cities else city.id
+
+
+# returns the router of the given class for the network, building it again if connections were added since
+def router_for(net: RailNetwork, cls):
+    router = net._routers.get(cls)
+    if router is None or router.stale():
+        router = net._routers[cls] = cls(net)
+    return router
+
+
+# this class answers earliest-arrival queries with the Connection Scan Algorithm. the connections are kept in one
+# array sorted by departure minute (taken from the table's departure index) and a query scans it once per day of
+# the search horizon. there is no limit on the number of transfers, but every change has to follow the layover rules
+# of booking (utils_time.layover_ok_minutes), so a route found here always passes Trip.validate_layover.
+# because of the maximum layover, the earliest arrival at a city isn't enough to know which trains can be taken
+# from it: every run of a connection that can be reached is kept as a "trip" (row, departure, previous trip) and
+# the arrivals of the trips are kept sorted per city, so the trips a departure can be changed from are a range of them.
+# times are absolute minutes counted from midnight of the weekday the journey starts on, so a (+1d) arrival
+# or a connection taken the next day simply has a value above 1440
+class ConnectionScanRouter(_TableView):
+    def __init__(self, net: RailNetwork) -> None:
+        super().__init__(net)
+        table = net.table
+        order = table.indexes["dep_min"].between()
+        self.rows = order.tolist()
+        self.dep = table.column("dep_min")[order].tolist()
+        self.trip = table.column("trip_minutes")[order].tolist()
+        self.dep_city = table.column("dep_city")[order].tolist()
+        self.arr_city = table.column("arr_city")[order].tolist()
+        self.days = table.column("days")[order].tolist()
+
+    # runs the scan from one city id. returns the earliest arrival per city id, the trips that were reached
+    # as (array index, absolute departure, index of the previous trip or None, absolute departure from the origin)
+    # and, for each reached city, the index of the trip that reached it first. when a target is given the scan
+    # stops as soon as no later departure can improve it
+    def scan(self, origin: int, start: int, weekday: int, target: Optional[int] = None, max_days: int = 2):
+        dep, trip, days = self.dep, self.trip, self.days
+        dep_city, arr_city = self.dep_city, self.arr_city
+        ea = [INF] * self.n_cities
+        best: list[Optional[int]] = [None] * self.n_cities
+        trips: list[tuple] = []
+        # per city: sorted arrival minutes of the trips that got there, and the trip of each
+        arrivals: list[list[int]] = [[] for _ in range(self.n_cities)]
+        arrived: list[list[int]] = [[] for _ in range(self.n_cities)]
+        ea[origin] = start
+
+        first = bisect_left(dep, start)
+        for d in range(max_days):
+            base = d * DAY
+            bit = 1 << ((weekday + d) % 7)
+            for i in range(first if d == 0 else 0, len(dep)):
+                t = base + dep[i]
+                if target is not None and t >= ea[target]:
+                    return ea, trips, best
+                if not days[i] & bit:
+                    continue
+                u = dep_city[i]
+                if u == origin:
+                    prev, journey_start = None, t
+                else:
+                    prev = _change_from(arrivals[u], arrived[u], trips, t, dep[i])
+                    if prev is None:
+                        continue
+                    journey_start = trips[prev][3]
+                v = arr_city[i]
+                if v == origin:
+                    continue
+                a = t + trip[i]
+                k = len(trips)
+                trips.append((i, t, prev, journey_start))
+                pos = bisect_right(arrivals[v], a)
+                arrivals[v].insert(pos, a)
+                arrived[v].insert(pos, k)
+                if a < ea[v] or (a == ea[v] and journey_start > trips[best[v]][3]):
+                    ea[v] = a
+                    best[v] = k
+        return ea, trips, best
+
+    # builds the route dict (same shape as find_indirect_connections) by following the trips back from the one
+    # that reached the target
+    def journey(self, trips, last: Optional[int]) -> Optional[dict]:
+        if last is None:
+            return None
+        legs = []
+        while last is not None:
+            i, t, last, _ = trips[last]
+            legs.append((i, t))
+        legs.reverse()
+
+        conns = self.net.connections
+        segments = [conns[self.rows[i]] for i, _ in legs]
+        arrivals = [t + self.trip[i] for i, t in legs]
+        wait_times = [legs[k + 1][1] - arrivals[k] for k in range(len(legs) - 1)]
+        return {
+            "segments": segments,
+            "wait_times": wait_times,
+            "total_minutes": arrivals[-1] - legs[0][1],
+            "arrival_minutes": arrivals[-1],
+        }
+
+    def earliest_arrival(self, from_city: str, to_city: str, depart_after: time, weekday: int,
+                         max_days: int = 2) -> Optional[dict]:
+        origin = self._city_id(from_city)
+        target = self._city_id(to_city)
+        if origin is None or target is None or origin == target:
+            return None
+        start = to_minutes(depart_after)
+        _, trips, best = self.scan(origin, start, weekday, target=target, max_days=max_days)
+        return self.journey(trips, best[target])
+
+
+# the trip to change from onto a train leaving at absolute minute t (dep_min in the day): among the arrivals at the
+# city that follow the layover rules, the one of the journey that left the origin last, None if there is none
+def _change_from(arrivals: list[int], arrived: list[int], trips: list[tuple], t: int, dep_min: int) -> Optional[int]:
+    lo = bisect_left(arrivals, t - MAX_DAY_LAYOVER)
+    hi = bisect_right(arrivals, t - MIN_LAYOVER)
+    found = None
+    for j in range(lo, hi):
+        k = arrived[j]
+        if layover_ok_minutes(arrivals[j] % DAY, dep_min) and (found is None or trips[k][3] > trips[found][3]):
+            found = k
+    return found
+
+
+# this class plans journeys that are Pareto-optimal over arrival time, total fare (first or second class) and number
+# of transfers, in the style of (multi-criteria) RAPTOR: round k only extends the labels created in round k-1 by one
+# more connection, so the work grows linearly with the number of rounds instead of with every combination of legs.
+# every change follows the layover rules of booking (utils_time.layover_ok_minutes), like ConnectionScanRouter.
+# a label is (arrival, fare, legs, previous label, row, departure) and is kept at a city only if no label of the
+# same or an earlier round arrives there at the same minute for no more money: because of the maximum layover an
+# earlier arrival can miss the trains a later one can take, so labels with different arrivals don't compete.
+# labels that can't beat a journey already found to the destination are dropped as well, since each extra leg only
+# adds time and money
+class ParetoPlanner(_TableView):
+    def __init__(self, net: RailNetwork) -> None:
+        super().__init__(net)
+        table = net.table
+        cols = [table.column(name).tolist() for name in
+                ("dep_city", "dep_min", "trip_minutes", "arr_city", "days", "first_class_eur", "second_class_eur")]
+        # departures of every city id: (dep_min, trip_minutes, arr_city, days, first, second, row)
+        self.out: list[list[tuple]] = [[] for _ in range(self.n_cities)]
+        for row, (u, *rest) in enumerate(zip(*cols)):
+            self.out[u].append((*rest, row))
+
+    def plan(self, from_city: str, to_city: str, depart_after: time, weekday: int, price_class: str = "second",
+             max_transfers: int = 3, max_days: int = 2) -> list[dict]:
+        origin = self._city_id(from_city)
+        target = self._city_id(to_city)
+        if origin is None or target is None or origin == target:
+            return []
+        first_class = price_class == "first"
+        start = to_minutes(depart_after)
+
+        # labels at every city id, by arrival minute
+        bags: list[dict[int, list[tuple]]] = [{} for _ in range(self.n_cities)]
+        start_label = (start, 0, 0, None, None, None)
+        bags[origin][start] = [start_label]
+        found: list[tuple] = []
+        marked = {origin: [start_label]}
+
+        for _ in range(max_transfers + 1):
+            new_marked: dict[int, list[tuple]] = {}
+            for city, labels in marked.items():
+                change = city != origin
+                for label in labels:
+                    arrival = label[0]
+                    for dep, trip, arr_city, days, first, second, row in self.out[city]:
+                        if change:
+                            t = next(_runs(dep, days, arrival + MIN_LAYOVER, weekday, max_days), None)
+                            if t is None or t - arrival >= DAY or not layover_ok_minutes(arrival % DAY, dep):
+                                continue
+                            runs = (t,)
+                        else:
+                            # any run can be taken from the origin: a later one may allow changes an earlier one doesn't
+                            runs = _runs(dep, days, arrival, weekday, max_days)
+                        for t in runs:
+                            fare = label[1] + (first if first_class else second)
+                            new = (t + trip, fare, label[2] + 1, label, row, t)
+                            if _dominated(new, found) or not _insert(bags[arr_city].setdefault(new[0], []), new):
+                                continue
+                            if arr_city == target:
+                                found.append(new)
+                            else:
+                                new_marked.setdefault(arr_city, []).append(new)
+            if not new_marked:
+                break
+            # labels dropped from a bag later in the round must not be extended
+            marked = {}
+            for c, ls in new_marked.items():
+                alive = {id(l) for bag in bags[c].values() for l in bag}
+                marked[c] = [l for l in ls if id(l) in alive]
+
+        # the bag of the destination only compared arrival and fare; a journey with fewer transfers stays on the front
+        front = [l for l in found
+                 if not any(o is not l and o[0] <= l[0] and o[1] <= l[1] and o[2] <= l[2] for o in found)]
+        front.sort(key=lambda l: (l[0], l[1], l[2]))
+        return [self._journey(l) for l in front]
+
+    def _journey(self, label: tuple) -> dict:
+        legs = []
+        while label[3] is not None:
+            legs.append(label)
+            label = label[3]
+        legs.reverse()
+        conns = self.net.connections
+        segments = [conns[l[4]] for l in legs]
+        wait_times = [legs[k + 1][5] - legs[k][0] for k in range(len(legs) - 1)]
+        return {
+            "segments": segments,
+            "wait_times": wait_times,
+            "total_minutes": legs[-1][0] - legs[0][5],
+            "arrival_minutes": legs[-1][0],
+            "fare": legs[-1][1],
+            "transfers": len(legs) - 1,
+        }
+
+
+# absolute departures of the runs of a connection at or after `ready` within the horizon, earliest first
+def _runs(dep: int, days: int, ready: int, weekday: int, max_days: int):
+    for d in range(max(0, -((dep - ready) // DAY)), max_days):
+        if days >> ((weekday + d) % 7) & 1:
+            yield d * DAY + dep
+
+def _dominated(label: tuple, others: list[tuple]) -> bool:
+    return any(o[0] <= label[0] and o[1] <= label[1] for o in others)
+
+# adds the label to the bag unless it is dominated, removing the labels it dominates. returns True if added
+def _insert(bag: list[tuple], label: tuple) -> bool:
+    if _dominated(label, bag):
+        return False
+    bag[:] = [o for o in bag if not (label[0] <= o[0] and label[1] <= o[1])]
+    bag.append(label)
+    return True
@@ -2,33 +2,63 @@ import unicodedata
 
 # this is the dictionary that presents the mapping of the days of the week to integers
 D3 = {"MON":0,"TUE":1,"WED":2,"THU":3,"FRI":4,"SAT":5,"SUN":6}
+DAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+# days of operation are stored as a 7-bit mask: bit d is set when the connection runs on weekday d (0=Mon)
+ALL_DAYS = 0b1111111
+
+# builds the mask from an iterable of weekday integers
+def days_mask(days) -> int:
+    mask = 0
+    for d in days:
+        mask |= 1 << d
+    return mask
+
+# true if the mask includes the weekday (out of range weekdays never match)
+def runs_on(mask: int, weekday: int) -> bool:
+    return 0 <= weekday < 7 and bool(mask >> weekday & 1)
+
+# days shared by all the given masks, e.g. the legs of an itinerary (0 means no common day)
+def common_days(*masks: int) -> int:
+    out = ALL_DAYS
+    for m in masks:
+        out &= m
+    return out
+
+# weekday integers of the mask in increasing order
+def weekdays(mask: int) -> list[int]:
+    return [d for d in range(7) if mask >> d & 1]
+
+# readable list of the days, e.g. "Monday, Wednesday, Friday"
+def format_days(mask: int, names: list[str] = DAY_NAMES) -> str:
+    return ", ".join(names[d] for d in weekdays(mask))
 
 # this method helps parsing the days of operation
 def _strip_accents_upper(s: str) -> str:
     s = unicodedata.normalize("NFKD", s.strip())
     return "".join(ch for ch in s if not unicodedata.combining(ch)).upper()
 
-# this method is used to parse the days of operation field in three scenarios
-def parse_days(s: str):
+# this method is used to parse the days of operation field in three scenarios, it returns the 7-bit days mask
+def parse_days(s: str) -> int:
     raw = s.strip()
     if not raw:
         raise ValueError("Empty days_of_operation")
     
     # when the days of operations are daily
     if raw.lower() == "daily":
-        return frozenset(range(7))
+        return ALL_DAYS
     
     # when there are consecutive days during which the connection operates
     if "-" in raw and "," not in raw:
         a,b = ( _strip_accents_upper(t)[:3] for t in raw.split("-",1) )
         ai, bi = D3[a], D3[b]
         seq = list(range(ai, bi+1)) if ai <= bi else list(range(ai,7))+list(range(0,bi+1))
-        return frozenset(seq)
+        return days_mask(seq)
     
     # when there are specific days for operations
     sep = "|" if "|" in raw else ","
     toks = [ _strip_accents_upper(t)[:3] for t in raw.split(sep) if t.strip() ]
-    return frozenset(D3[t] for t in toks)
+    return days_mask(D3[t] for t in toks)
 
 # this method parses the prices for both the first and the second class
 def parse_price_int(s: str) -> int:
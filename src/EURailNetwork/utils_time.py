@@ -1,11 +1,15 @@
 import re
-from datetime import datetime, time
+from datetime import time
+
+# times of day are kept as integer minutes since midnight (0..1439) everywhere in the network and the searches;
+# datetime.time objects are only built for display and storage (from_minutes / format_time)
+DAY_MINUTES = 24 * 60
 
 # this is the template against which the input is valid to make sure that we are processing valid data
 _TIME_WITH_OFFSET = re.compile(r"^\s*(\d{2}):(\d{2})\s*(?:\(\+(\d+)d\))?\s*$", re.IGNORECASE)
 
 # this method parses the time as HH:MM that has no offset (+1d)
-# wrapper 
+# wrapper
 def parse_time(s: str) -> time:
     t, _ = parse_time_with_offset(s)
     return t
@@ -13,6 +17,11 @@ def parse_time(s: str) -> time:
 # this method parses the time as HH:MM when there is an offset (+1d)
 # this is the specialized helper of parse_time
 def parse_time_with_offset(s: str) -> tuple[time, int]:
+    minutes, off = parse_minutes_with_offset(s)
+    return from_minutes(minutes), off
+
+# same as parse_time_with_offset, but returns the minutes since midnight
+def parse_minutes_with_offset(s: str) -> tuple[int, int]:
     m = _TIME_WITH_OFFSET.match(s)
     if not m:
         raise ValueError(f"Invalid time format: {s!r} (expected 'HH:MM' or 'HH:MM (+Nd)')")
@@ -20,61 +29,63 @@ def parse_time_with_offset(s: str) -> tuple[time, int]:
     off = int(m.group(3)) if m.group(3) else 0
     if not (0 <= hh <= 23 and 0 <= mm <= 59):
         raise ValueError(f"Out-of-range time: {s!r}")
-    return time(hour=hh, minute=mm), off
+    return hh * 60 + mm, off
+
+def to_minutes(t: time) -> int:
+    return t.hour * 60 + t.minute
+
+def from_minutes(minutes: int) -> time:
+    return time(*divmod(minutes % DAY_MINUTES, 60))
 
 # this method calculates the total duration of a trip in minutes when there is no offset
 def duration_minutes(dep: time, arr: time) -> int:
-    dm, am = dep.hour*60 + dep.minute, arr.hour*60 + arr.minute
-    d = (am - dm) % (24*60)
+    d = (to_minutes(arr) - to_minutes(dep)) % DAY_MINUTES
     if d == 0:
         raise ValueError("Zero-duration trips are not allowed.")
     return d
 
-# this method calculates the total duration of a trip in minutes when there is an offset 
+# this method calculates the total duration of a trip in minutes when there is an offset
 def duration_minutes_with_offset(dep: time, arr: time, arr_day_offset: int = 0) -> int:
-    dm = dep.hour*60 + dep.minute
-    am = arr.hour*60 + arr.minute + arr_day_offset*24*60
-    diff = am - dm
-    if diff <= 0:
-        diff += 24*60
-    return diff
-
-
-def calculate_wait_time(arrival: time, next_departure: time) -> int:
-    """Return waiting time in minutes between two trains (handles next-day cases)."""
-    arrival_minutes = arrival.hour * 60 + arrival.minute
-    next_minutes = next_departure.hour * 60 + next_departure.minute
-    diff = next_minutes - arrival_minutes
-    if diff < 0:
-        diff += 24 * 60
-    return diff
+    return trip_minutes(to_minutes(dep), to_minutes(arr), arr_day_offset)
 
-def calculate_wait_time(arrival: time, next_departure: time) -> int:
-    """
-    Return waiting time between arrival and next departure (in minutes).
-    Handles next-day departures automatically.
-    """
-    arr = arrival.hour * 60 + arrival.minute
-    dep = next_departure.hour * 60 + next_departure.minute
-    diff = dep - arr
-    if diff < 0:
-        diff += 24 * 60
+# same as duration_minutes_with_offset on minutes since midnight. an arrival that isn't after the departure
+# without its offset is taken as the next day
+def trip_minutes(dep_min: int, arr_min: int, arr_day_offset: int = 0) -> int:
+    diff = arr_min + arr_day_offset * DAY_MINUTES - dep_min
+    if diff <= 0:
+        diff += DAY_MINUTES
     return diff
-from datetime import datetime, timedelta, time
 
 def calculate_wait_time(arrival: time, next_departure: time) -> int:
     """
     Calculate waiting time in minutes between two train connections.
     Supports next-day departures (e.g. arrival 23:00, next departure 05:00).
     """
-    arr_minutes = arrival.hour * 60 + arrival.minute
-    dep_minutes = next_departure.hour * 60 + next_departure.minute
-    wait = dep_minutes - arr_minutes
-    if wait < 0:
-        wait += 24 * 60  
-        # handle overnight connection
-    return wait
+    return wait_minutes(to_minutes(arrival), to_minutes(next_departure))
+
+# same as calculate_wait_time on minutes since midnight
+def wait_minutes(arr_min: int, dep_min: int) -> int:
+    return (dep_min - arr_min) % DAY_MINUTES
 
 def format_time(t: time) -> str:
     """Format a time object as 'HH:MM' for storage or display."""
-    return t.strftime("%H:%M")
\ No newline at end of file
+    return t.strftime("%H:%M")
+
+# layover rules, shared by Trip.validate_layover (booking) and the indirect route search (pruning):
+# at least 10 min at any time of day to change trains, at most 2 hours when the next train leaves during the
+# day (06:00 incl. - 19:00 excl.) and at most 30 minutes at night
+MIN_LAYOVER = 10
+MAX_DAY_LAYOVER = 120
+MAX_NIGHT_LAYOVER = 30
+_DAY_START = 6 * 60
+_DAY_END = 19 * 60
+
+def layover_ok(arrival: time, next_departure: time) -> bool:
+    return layover_ok_minutes(to_minutes(arrival), to_minutes(next_departure))
+
+# same as layover_ok on minutes since midnight, this is the one the searches call
+def layover_ok_minutes(arr_min: int, dep_min: int) -> bool:
+    wait = (dep_min - arr_min) % DAY_MINUTES
+    if _DAY_START <= dep_min < _DAY_END:
+        return MIN_LAYOVER <= wait <= MAX_DAY_LAYOVER
+    return MIN_LAYOVER <= wait <= MAX_NIGHT_LAYOVER
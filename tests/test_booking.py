@@ -0,0 +1,81 @@
+import textwrap
+from dataclasses import replace
+from pathlib import Path
+
+import pytest
+
+from EURailNetwork.loader import read_raw_csv, build_network_from_df
+from EURailNetwork.registries import BookingSystem, RailNetwork
+
+# Paris -> Lyon -> Marseille with a valid 30 min change in Lyon
+def _make_csv(tmp_path: Path) -> str:
+    csv = textwrap.dedent("""\
+        Route ID,Departure City,Arrival City,Departure Time,Arrival Time,Train Type,Days of Operation,First Class ticket rate (in euro),Second Class ticket rate (in euro)
+        R1,Paris,Lyon,08:00,10:00,TGV,Daily,100,50
+        R2,Lyon,Marseille,10:30,12:00,TGV,Daily,60,30
+    """)
+    p = tmp_path / "routes.csv"
+    p.write_text(csv, encoding="utf-8")
+    return str(p)
+
+@pytest.fixture()
+def net(tmp_path: Path) -> RailNetwork:
+    return build_network_from_df(read_raw_csv(_make_csv(tmp_path)))
+
+TRAVELLER = {"first_name": "Ada", "last_name": "Lovelace", "age": 36, "id": "T1"}
+
+
+# 1. Connections get dense ids in insertion order and can only be added once
+def test_connection_ids(net: RailNetwork):
+    assert [c.id for c in net.connections] == [0, 1]
+    assert all(net.has_connection(c) for c in net.connections)
+    with pytest.raises(ValueError):
+        net.add_connection(net.connections[0])
+
+# 2. Booking checks identity: an equal copy of a connection is not part of the network
+def test_book_trip_membership(net: RailNetwork):
+    system = BookingSystem(railNetwork=net)
+    trip = system.book_trip(net.connections, [TRAVELLER])
+    assert [c.route_id for c in trip.connections] == ["R1", "R2"]
+
+    copy = replace(net.connections[0])
+    assert not net.has_connection(copy)
+    with pytest.raises(ValueError):
+        system.book_trip(copy, [TRAVELLER])
+
+# 3. Saved trips are restored onto the connections of a freshly loaded network
+def test_trips_round_trip(net: RailNetwork, tmp_path: Path):
+    system = BookingSystem(railNetwork=net)
+    system.book_trip(net.connections[1], [TRAVELLER])
+    path = str(tmp_path / "trips.json")
+    system.save_trips(path)
+
+    other = build_network_from_df(read_raw_csv(_make_csv(tmp_path)))
+    restored = BookingSystem(railNetwork=other)
+    restored.load_trips(path)
+    assert restored.trips.items[0].connections == [other.connections[1]]
+
+# 4. Trip legs are stored in the database by connection id and restored onto another network
+def test_trips_round_trip_db(net: RailNetwork, tmp_path: Path):
+    from EURailNetwork import db_sqlite
+
+    conn = db_sqlite.connect(str(tmp_path / "eurail.db"))
+    db_sqlite.migrate(conn)
+    ids = db_sqlite.save_network(conn, net)
+    assert db_sqlite.connection_db_ids(conn, net) == ids
+
+    system = BookingSystem(railNetwork=net, db_connection=conn, db_connection_ids=ids)
+    trip = system.book_trip(net.connections, [TRAVELLER])
+    system.save_trip_to_db(trip, conn)
+    # without the ids of save_network they are looked up once
+    other = BookingSystem(railNetwork=net, db_connection=conn)
+    other_trip = other.book_trip(net.connections[1], [TRAVELLER])
+    other.save_trip_to_db(other_trip, conn)
+    assert other.db_connection_ids == ids
+
+    fresh = build_network_from_df(read_raw_csv(_make_csv(tmp_path)))
+    restored = BookingSystem(railNetwork=fresh)
+    db_sqlite.load_trips(conn, restored, fresh)
+    legs = {t.id: t.connections for t in restored.trips.items}
+    assert legs[trip.id] == fresh.connections
+    assert legs[other_trip.id] == [fresh.connections[1]]
@@ -0,0 +1,83 @@
+import textwrap
+from datetime import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from EURailNetwork.columnar import COLUMNS, ConnectionTable
+from EURailNetwork.loader import read_raw_csv, build_network_from_df
+from EURailNetwork.registries import RailNetwork
+from EURailNetwork.schema import runs_on
+
+# Connections on different days, prices, times and durations, including an overnight one
+def _make_csv(tmp_path: Path) -> str:
+    csv = textwrap.dedent("""\
+        Route ID,Departure City,Arrival City,Departure Time,Arrival Time,Train Type,Days of Operation,First Class ticket rate (in euro),Second Class ticket rate (in euro)
+        R1,Paris,Lyon,08:00,10:00,TGV,Daily,100,50
+        R2,Paris,Lyon,12:00,14:30,TER,Mon-Fri,60,30
+        R3,Lyon,Marseille,10:30,12:00,TGV,Sat-Sun,70,35
+        R4,Paris,Berlin,22:30,06:10 (+1d),Nightjet,Mon|Wed|Fri,150,90
+        R5,Berlin,Paris,07:00,15:00,ICE,Tue,140,80
+    """)
+    p = tmp_path / "routes.csv"
+    p.write_text(csv, encoding="utf-8")
+    return str(p)
+
+@pytest.fixture()
+def net(tmp_path: Path) -> RailNetwork:
+    return build_network_from_df(read_raw_csv(_make_csv(tmp_path)))
+
+
+# 1. Row i of every column holds the numbers of connections[i], the columns grow past their capacity
+def test_table_columns(net: RailNetwork):
+    table = ConnectionTable(capacity=1)
+    for c in net.connections:
+        table.append(c)
+    assert len(table) == len(net.connections)
+    for name in COLUMNS:
+        assert table.column(name).tolist() == net.table.column(name).tolist()
+    conns = net.connections
+    assert table.column("dep_min").tolist() == [c.dep_min for c in conns]
+    assert table.column("trip_minutes").tolist() == [c.trip_minutes for c in conns]
+    assert table.column("dep_city").tolist() == [c.dep_city.id for c in conns]
+    assert table.column("train").tolist() == [c.train.id for c in conns]
+    assert table.column("days").tolist() == [c.days_mask for c in conns]
+    with pytest.raises(ValueError):
+        table.column("dep_min")[0] = 0
+
+# 2. The sorted indexes answer range lookups, including rows appended after the previous lookup
+def test_sorted_index(net: RailNetwork):
+    index = net.table.indexes["dep_min"]
+    assert index.between(8 * 60, 12 * 60).tolist() == [0, 2, 1]
+    assert index.between(hi=7 * 60).tolist() == [4]
+    first = net.connections[0]
+    net.add_connection(type(first)(route_id="R6", dep_city=first.dep_city, arr_city=first.arr_city, dep_min=9 * 60,
+                                   arr_min=11 * 60, days_mask=1, first_class_eur=90, second_class_eur=45,
+                                   train=first.train, trip_minutes=120))
+    assert index.between(8 * 60, 12 * 60).tolist() == [0, 5, 2, 1]
+
+# 3. The mask filters of search_connections give the same connections as checking every connection
+@pytest.mark.parametrize("filters", [
+    {"weekday": 1},
+    {"weekday": 5, "train_type": "tgv"},
+    {"weekday": 9},
+    {"min_first_class_price": 70, "max_second_class_price": 80},
+    {"min_duration": 120, "max_duration": 480},
+    {"min_departure_time": time(8), "max_arrival_time": time(14)},
+    {"depart_city": "paris", "weekday": 4, "max_first_class_price": 120},
+])
+def test_mask_filters(net: RailNetwork, filters: dict):
+    def ok(c):
+        f = filters
+        return ((f.get("weekday") is None or runs_on(c.days_mask, f["weekday"]))
+                and ("train_type" not in f or f["train_type"] in c.train.name.lower())
+                and ("depart_city" not in f or f["depart_city"] in c.dep_city.name.lower())
+                and c.first_class_eur >= f.get("min_first_class_price", 0)
+                and c.first_class_eur <= f.get("max_first_class_price", np.inf)
+                and c.second_class_eur <= f.get("max_second_class_price", np.inf)
+                and f.get("min_duration", 0) <= c.trip_minutes <= f.get("max_duration", np.inf)
+                and c.dep_time >= f.get("min_departure_time", time(0))
+                and c.arr_time <= f.get("max_arrival_time", time(23, 59)))
+    expected = {c.route_id for c in net.connections if ok(c)}
+    assert {c.route_id for c in net.search_connections(**filters)} == expected
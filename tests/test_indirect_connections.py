@@ -0,0 +1,96 @@
+import textwrap
+from datetime import time
+from pathlib import Path
+
+import pytest
+
+from EURailNetwork.loader import read_raw_csv, build_network_from_df
+from EURailNetwork.models import Trip
+from EURailNetwork.registries import RailNetwork
+
+# Small network with 1-stop and 2-stop routes from Paris to Marseille
+def _make_csv(tmp_path: Path) -> str:
+    csv = textwrap.dedent("""\
+        Route ID,Departure City,Arrival City,Departure Time,Arrival Time,Train Type,Days of Operation,First Class ticket rate (in euro),Second Class ticket rate (in euro)
+        R1,Paris,Lyon,08:00,10:00,TGV,Daily,100,50
+        R2,Lyon,Marseille,10:30,12:00,TGV,Daily,60,30
+        R3,Paris,Dijon,07:00,08:30,TER,Daily,40,20
+        R4,Dijon,Lyon,09:00,10:15,TER,Daily,40,20
+        R5,Lyon,Marseille,20:00,22:00,InterCity,Daily,50,25
+        R6,Marseille,Nice,12:30,14:00,TER,Daily,30,15
+    """)
+    p = tmp_path / "routes.csv"
+    p.write_text(csv, encoding="utf-8")
+    return str(p)
+
+@pytest.fixture()
+def net(tmp_path: Path) -> RailNetwork:
+    return build_network_from_df(read_raw_csv(_make_csv(tmp_path)))
+
+def _ids(routes):
+    return [[seg.route_id for seg in r["segments"]] for r in routes]
+
+
+# 1. 1-stop routes come first, then 2-stop routes, with waits and totals
+def test_indirect_routes_and_waits(net: RailNetwork):
+    routes = net.find_indirect_connections("Paris", "Marseille")
+    assert _ids(routes) == [["R1", "R2"], ["R3", "R4", "R2"]]
+    assert routes[0]["wait_times"] == [30]
+    assert routes[0]["total_minutes"] == 240
+    assert routes[1]["wait_times"] == [30, 15]
+    assert routes[1]["total_minutes"] == 300
+
+# 2. City names are matched case-insensitively
+def test_indirect_case_insensitive(net: RailNetwork):
+    assert _ids(net.find_indirect_connections("paris", "MARSEILLE")) == \
+        _ids(net.find_indirect_connections("Paris", "Marseille"))
+
+# 3. max_stops=1 only returns the 1-stop routes
+def test_indirect_max_stops(net: RailNetwork):
+    assert _ids(net.find_indirect_connections("Paris", "Marseille", max_stops=1)) == [["R1", "R2"]]
+
+# 4. Unknown cities give no routes
+def test_indirect_unknown_city(net: RailNetwork):
+    assert net.find_indirect_connections("Paris", "Atlantis") == []
+    assert net.find_indirect_connections("Atlantis", "Paris") == []
+
+# 5. Changes that break the layover rules are never returned (R5 leaves Lyon 10 hours after R1 arrives),
+#    and every route that is returned can be booked
+def test_indirect_only_bookable_routes(net: RailNetwork):
+    routes = net.find_indirect_connections("Paris", "Marseille")
+    assert all("R5" not in ids for ids in _ids(routes))
+    for r in routes:
+        trip = Trip(connections=list(r["segments"]))
+        assert trip.validate_layover()
+
+# 6. The generator yields the same routes as find_indirect_connections, shortest first
+def test_iter_indirect_by_duration(net: RailNetwork):
+    routes = list(net.iter_indirect_connections("Paris", "Marseille"))
+    assert _ids(routes) == [["R1", "R2"], ["R3", "R4", "R2"]]
+    assert [r["total_minutes"] for r in routes] == [240, 300]
+    assert routes[1]["wait_times"] == [30, 15]
+
+# 7. Other costs order by fare, and top-k stops after k routes
+def test_top_indirect_by_fare(net: RailNetwork):
+    cheapest = net.top_indirect_connections("Paris", "Marseille", k=1, cost="second_class_eur")
+    assert _ids(cheapest) == [["R3", "R4", "R2"]]
+    assert net.top_indirect_connections("Paris", "Marseille", k=5) == \
+        list(net.iter_indirect_connections("Paris", "Marseille"))
+    with pytest.raises(ValueError):
+        next(net.iter_indirect_connections("Paris", "Marseille", cost="co2"))
+
+# 8. The search_connections filters are checked on every leg, the duration on the whole route
+def test_indirect_filters(net: RailNetwork):
+    assert _ids(net.find_indirect_connections("Paris", "Marseille", train_type="TGV")) == [["R1", "R2"]]
+    assert _ids(net.find_indirect_connections("Paris", "Marseille", max_second_class_price=25)) == []
+    assert _ids(net.find_indirect_connections("Paris", "Marseille", min_departure_time=time(7, 30))) == [["R1", "R2"]]
+    assert _ids(net.find_indirect_connections("Paris", "Marseille", max_duration=250)) == [["R1", "R2"]]
+    assert _ids(net.find_indirect_connections("Paris", "Marseille", min_duration=250)) == [["R3", "R4", "R2"]]
+    assert _ids(net.iter_indirect_connections("Paris", "Marseille", train_type="TER", max_duration=400)) == []
+    with pytest.raises(TypeError):
+        net.find_indirect_connections("Paris", "Marseille", sort_by="dep_time")
+
+# 9. 2-stop routes are joined on the middle leg (Lyon → Marseille) between the first and the last leg
+def test_indirect_two_stops_joined_in_the_middle(net: RailNetwork):
+    assert _ids(net.find_indirect_connections("Paris", "Nice")) == [["R1", "R2", "R6"]]
+    assert net.find_indirect_connections("Paris", "Nice", max_stops=1) == []
@@ -0,0 +1,109 @@
+import textwrap
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from EURailNetwork.loader import (COLS, build_network_from_df, load_network, load_network_parallel, read_raw_csv,
+                                  sniff_delimiter)
+from EURailNetwork.parallel import snapshot
+from EURailNetwork.schema import ALL_DAYS, parse_days
+
+HEADER = "Route ID,Departure City,Arrival City,Departure Time,Arrival Time,Train Type,Days of Operation,First Class ticket rate (in euro),Second Class ticket rate (in euro)"
+
+# Padded values, a quoted field with the delimiter in it and an accented city, written with the given delimiter
+def _make_csv(tmp_path: Path, sep: str = ",") -> str:
+    rows = textwrap.dedent("""\
+        R1, Paris ,Lyon ,08:00,10:00,TGV,Daily,100,50
+        R2,Zürich,Genève,22:30,06:10 (+1d), Nightjet ,"Mon,Wed",150, 80
+    """)
+    p = tmp_path / "routes.csv"
+    p.write_text("﻿" + (HEADER + "\n" + rows).replace(",", sep).replace('"Mon' + sep + 'Wed"', '"Mon,Wed"'),
+                 encoding="utf-8")
+    return str(p)
+
+
+# 1. The delimiter comes from the header line and every value is trimmed
+@pytest.mark.parametrize("sep", [",", ";", "\t"])
+def test_read_raw_csv(tmp_path: Path, sep: str):
+    path = _make_csv(tmp_path, sep)
+    assert sniff_delimiter(path) == sep
+    df = read_raw_csv(path)
+    assert list(df.columns) == COLS
+    assert df["departure_city"].tolist() == ["Paris", "Zürich"]
+    assert df["train_type"].tolist() == ["TGV", "Nightjet"]
+    assert df["days_of_operation"].tolist() == ["Daily", "Mon,Wed"]
+    assert df["second_class_eur"].tolist() == ["50", "80"]
+
+# 2. Same frame as pandas' own delimiter sniffing with the python engine
+def test_read_raw_csv_matches_python_engine(tmp_path: Path):
+    path = _make_csv(tmp_path, ";")
+    slow = pd.read_csv(path, dtype=str, keep_default_na=False, encoding="utf-8-sig", sep=None, engine="python")
+    slow.columns = COLS
+    pd.testing.assert_frame_equal(read_raw_csv(path), slow.apply(lambda s: s.str.strip()))
+
+# 3. Missing columns are reported with the columns that were found
+def test_read_raw_csv_missing_columns(tmp_path: Path):
+    p = tmp_path / "routes.csv"
+    p.write_text("Route ID;Departure City\nR1;Paris\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="Missing columns"):
+        read_raw_csv(str(p))
+
+# 4. Whole-column parsing gives the same connections as the scalar parsers, cities in order of first appearance
+def test_build_network_from_df(tmp_path: Path):
+    net = build_network_from_df(read_raw_csv(_make_csv(tmp_path)))
+    assert [c.name for c in net.cities.items] == ["Paris", "Lyon", "Zürich", "Genève"]
+    r1, r2 = net.connections
+    assert (r1.dep_min, r1.arr_min, r1.trip_minutes, r1.days_mask) == (480, 600, 120, ALL_DAYS)
+    assert (r2.dep_min, r2.arr_min, r2.trip_minutes, r2.day_offset) == (22 * 60 + 30, 6 * 60 + 10, 460, 1)
+    assert (r2.days_mask, r2.first_class_eur, r2.second_class_eur) == (parse_days("Mon,Wed"), 150, 80)
+    assert r2.train is net.trains.find("nightjet")
+
+# 5. Invalid values are reported with the row they are on
+@pytest.mark.parametrize("row, message", [
+    ("R3,Paris,Lyon,8h,10:00,TGV,Daily,100,50", "Row 2: Invalid time format"),
+    ("R3,Paris,Lyon,08:00 (+1d),10:00,TGV,Daily,100,50", "Row 2: departure_time has unexpected day offset"),
+    ("R3,Paris,Lyon,08:00,10:00,TGV,,100,50", "Row 2: Empty days_of_operation"),
+    ("R3,Paris,Lyon,08:00,10:00,TGV,Daily,-1,50", "Row 2: Negative price"),
+    ("R3,Paris, PARIS ,08:00,10:00,TGV,Daily,100,50", r"Row 2: departure equals arrival \(Paris\)"),
+])
+def test_build_network_row_errors(tmp_path: Path, row: str, message: str):
+    path = Path(_make_csv(tmp_path))
+    path.write_text(path.read_text(encoding="utf-8") + row + "\n", encoding="utf-8")
+    with pytest.raises(ValueError, match=message):
+        build_network_from_df(read_raw_csv(str(path)))
+
+# 6. Reading in chunks builds the same network, with the same row numbers in errors
+def test_load_network_chunks(tmp_path: Path):
+    path = Path(_make_csv(tmp_path))
+    path.write_text(path.read_text(encoding="utf-8") + "R3,Lyon,Paris,11:00,13:00,TGV,Sat-Sun,90,45\n", encoding="utf-8")
+    whole = build_network_from_df(read_raw_csv(str(path)))
+    streamed = load_network(str(path), chunksize=2)
+    assert snapshot(streamed) == snapshot(whole)
+
+    path.write_text(path.read_text(encoding="utf-8") + "R4,Lyon,Paris,11:00,13:00,TGV,Daily,x,45\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="Row 3: invalid literal"):
+        load_network(str(path), chunksize=2)
+
+# 7. Parsing pieces of the file in worker processes builds the same network, with global row numbers in errors
+def test_load_network_parallel(tmp_path: Path):
+    path = Path(_make_csv(tmp_path))
+    path.write_text(path.read_text(encoding="utf-8") + "\nR3,Lyon,Paris,11:00,13:00,TGV,Sat-Sun,90,45\n",
+                    encoding="utf-8")
+    whole = snapshot(load_network(str(path)))
+    assert snapshot(load_network_parallel(str(path), workers=2, chunk_bytes=40)) == whole
+    assert snapshot(load_network_parallel(str(path), workers=1)) == whole
+
+    path.write_text(path.read_text(encoding="utf-8") + "R4,Lyon,Paris,11:00,13:00,TGV,Daily,x,45\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="Row 3: invalid literal"):
+        load_network_parallel(str(path), workers=2, chunk_bytes=40)
+
+# 8. Pieces are never cut inside a quoted value, even one that holds a line break
+def test_load_network_parallel_quoted_line_break(tmp_path: Path):
+    path = Path(_make_csv(tmp_path))
+    path.write_text(path.read_text(encoding="utf-8") + 'R3,Lyon,Paris,11:00,13:00,"TGV\nDuplex",Sat-Sun,90,45\n'
+                    + 'R4,Lyon,"Pa""ris",12:00,14:00,TGV,Daily,90,45\n', encoding="utf-8")
+    whole = load_network(str(path))
+    assert whole.connections[2].train.name == "TGV\nDuplex"
+    for chunk_bytes in (1, 10, 60):
+        assert snapshot(load_network_parallel(str(path), workers=2, chunk_bytes=chunk_bytes)) == snapshot(whole)
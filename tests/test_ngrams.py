@@ -0,0 +1,32 @@
+from EURailNetwork.ngrams import NGramIndex
+from EURailNetwork.registries import Cities
+
+# 1. Substring search through the trigram postings, with ids in insertion order
+def test_ngram_index_substring():
+    idx = NGramIndex()
+    for name in ["paris", "lyon", "saint-etienne", "parma"]:
+        idx.add(name)
+    assert idx.search("par") == [0, 3]
+    assert idx.search("etienne") == [2]
+    assert idx.search("xyz") == []
+
+# 2. Sharing every trigram is not enough, the match has to be contiguous
+def test_ngram_index_verifies_candidates():
+    idx = NGramIndex()
+    idx.add("abcxbcd")
+    assert idx.search("abcd") == []
+
+# 3. Patterns shorter than a trigram fall back to scanning the stored keys
+def test_ngram_index_short_pattern():
+    idx = NGramIndex()
+    idx.add("bern")
+    idx.add("brno")
+    assert idx.search("er") == [0]
+    assert idx.search("") == [0, 1]
+
+# 4. Cities.search normalizes the pattern the same way as get_or_create
+def test_cities_search():
+    cities = Cities()
+    paris = cities.get_or_create("Paris")
+    cities.get_or_create("Lyon")
+    assert cities.search("  PAR ") == [paris]
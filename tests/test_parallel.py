@@ -0,0 +1,48 @@
+import textwrap
+from pathlib import Path
+
+import pytest
+
+from EURailNetwork.loader import read_raw_csv, build_network_from_df
+from EURailNetwork.parallel import restore, snapshot
+from EURailNetwork.registries import RailNetwork
+
+# Paris -> Lyon -> Marseille -> Nice through Dijon or directly, one Monday-only leg
+def _make_csv(tmp_path: Path) -> str:
+    csv = textwrap.dedent("""\
+        Route ID,Departure City,Arrival City,Departure Time,Arrival Time,Train Type,Days of Operation,First Class ticket rate (in euro),Second Class ticket rate (in euro)
+        R1,Paris,Lyon,08:00,10:00,TGV,Daily,100,50
+        R2,Lyon,Marseille,10:30,12:00,TGV,Daily,60,30
+        R3,Paris,Dijon,07:00,08:30,TER,Mon,40,20
+        R4,Dijon,Lyon,09:00,10:15,TER,Daily,40,20
+        R6,Marseille,Nice,12:30,14:00,TER,Daily,30,15
+    """)
+    p = tmp_path / "routes.csv"
+    p.write_text(csv, encoding="utf-8")
+    return str(p)
+
+@pytest.fixture()
+def net(tmp_path: Path) -> RailNetwork:
+    return build_network_from_df(read_raw_csv(_make_csv(tmp_path)))
+
+def _ids(routes):
+    return [[seg.route_id for seg in r["segments"]] for r in routes]
+
+
+# 1. A snapshot rebuilds the same network, in the same order
+def test_snapshot_roundtrip(net: RailNetwork):
+    copy = restore(snapshot(net))
+    assert [c.name for c in copy.cities.items] == [c.name for c in net.cities.items]
+    assert [c.route_id for c in copy.connections] == [c.route_id for c in net.connections]
+    assert copy.connections[2].days_mask == net.connections[2].days_mask
+
+# 2. Batch routing in a pool gives the routes of every query in input order, with the parent's connections
+def test_find_indirect_batch(net: RailNetwork):
+    queries = [("Paris", "Marseille", None), ("Paris", "Marseille", 1), ("Paris", "Nice", 0), ("Nice", "Paris", None)]
+    serial = list(net.find_indirect_batch(queries, workers=1))
+    assert [_ids(r) for r in serial] == [[["R1", "R2"], ["R3", "R4", "R2"]], [["R1", "R2"]], [["R1", "R2", "R6"]], []]
+
+    pooled = list(net.find_indirect_batch(iter(queries), workers=2, chunksize=1))
+    assert [_ids(r) for r in pooled] == [_ids(r) for r in serial]
+    assert pooled[0][0]["segments"][0] is net.connections[0]
+    assert pooled[0][1]["wait_times"] == [30, 15]
@@ -0,0 +1,81 @@
+import textwrap
+from pathlib import Path
+
+import pytest
+
+from EURailNetwork.loader import read_raw_csv, build_network_from_df
+from EURailNetwork.models import Connection
+from EURailNetwork.registries import RailNetwork
+
+# Three Paris -> Lyon connections and one Lyon -> Marseille
+def _make_csv(tmp_path: Path) -> str:
+    csv = textwrap.dedent("""\
+        Route ID,Departure City,Arrival City,Departure Time,Arrival Time,Train Type,Days of Operation,First Class ticket rate (in euro),Second Class ticket rate (in euro)
+        R1,Paris,Lyon,08:00,10:00,TGV,Daily,100,50
+        R2,Paris,Lyon,12:00,14:00,TGV,Mon-Fri,100,50
+        R3,Paris,Lyon,18:00,20:30,TER,Daily,60,30
+        R4,Lyon,Marseille,10:30,12:00,TGV,Daily,60,30
+    """)
+    p = tmp_path / "routes.csv"
+    p.write_text(csv, encoding="utf-8")
+    return str(p)
+
+@pytest.fixture()
+def net(tmp_path: Path) -> RailNetwork:
+    return build_network_from_df(read_raw_csv(_make_csv(tmp_path)))
+
+def _ids(conns):
+    return [c.route_id for c in conns]
+
+
+# 1. Repeated searches are served from the cache, whatever the spelling of the names
+def test_query_cache_hits(net: RailNetwork):
+    assert net.query_cache_stats() is None
+    net.enable_query_cache(maxsize=8)
+    first = net.search_connections(depart_city="Paris", arrival_city="Lyon")
+    again = net.search_connections(depart_city="  PARIS ", arrival_city="lyon")
+    assert _ids(first) == _ids(again) == ["R1", "R2", "R3"]
+    assert _ids(net.find_direct("Paris", "Lyon", weekday=6)) == ["R1", "R3"]
+    assert _ids(net.find_direct("paris", "LYON", weekday=6)) == ["R1", "R3"]
+    stats = net.query_cache_stats()
+    assert (stats.hits, stats.misses, stats.size) == (2, 2, 2)
+
+    # the caller gets its own list
+    first.clear()
+    assert _ids(net.search_connections(depart_city="Paris", arrival_city="Lyon")) == ["R1", "R2", "R3"]
+
+# 2. Adding a connection invalidates every cached result
+def test_query_cache_invalidated_by_add(net: RailNetwork):
+    net.enable_query_cache()
+    assert _ids(net.find_direct("Lyon", "Paris")) == []
+    r4 = net.connections[3]
+    net.add_connection(Connection(
+        route_id="R5",
+        dep_city=r4.dep_city,
+        arr_city=net.connections[0].dep_city,
+        dep_min=15 * 60,
+        arr_min=17 * 60,
+        days_mask=r4.days_mask,
+        first_class_eur=100,
+        second_class_eur=50,
+        train=r4.train,
+        trip_minutes=120,
+    ))
+    assert _ids(net.find_direct("Lyon", "Paris")) == ["R5"]
+    assert _ids(net.search_connections(depart_city="Lyon")) == ["R4", "R5"]
+    assert net.query_cache_stats().hits == 0
+
+# 3. The least recently used result is evicted once the cache is full
+def test_query_cache_eviction(net: RailNetwork):
+    net.enable_query_cache(maxsize=2)
+    net.search_connections(train_type="TGV")
+    net.search_connections(train_type="TER")
+    net.search_connections(train_type="TGV")
+    net.search_connections(max_duration=100)
+    assert net.query_cache_stats().evictions == 1
+    net.search_connections(train_type="TGV")
+    net.search_connections(train_type="TER")
+    stats = net.query_cache_stats()
+    assert (stats.hits, stats.misses, stats.evictions, stats.size) == (2, 4, 2, 2)
+    with pytest.raises(ValueError):
+        net.enable_query_cache(maxsize=0)
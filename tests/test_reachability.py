@@ -0,0 +1,108 @@
+import textwrap
+from pathlib import Path
+
+import pytest
+
+from EURailNetwork.loader import read_raw_csv, build_network_from_df
+from EURailNetwork.models import Connection
+from EURailNetwork.reachability import ReachabilityTable, reachability_for, timetable_hash
+from EURailNetwork.registries import RailNetwork
+from EURailNetwork.schema import ALL_DAYS
+
+# Paris -> Lyon -> Marseille -> Nice, a Monday-only direct Paris -> Marseille and an isolated Brest -> Rennes
+def _make_csv(tmp_path: Path) -> str:
+    csv = textwrap.dedent("""\
+        Route ID,Departure City,Arrival City,Departure Time,Arrival Time,Train Type,Days of Operation,First Class ticket rate (in euro),Second Class ticket rate (in euro)
+        R1,Paris,Lyon,08:00,10:00,TGV,Daily,100,50
+        R2,Lyon,Marseille,10:30,12:00,TGV,Daily,60,30
+        R3,Paris,Marseille,09:00,13:30,InterCity,Mon,70,35
+        R4,Marseille,Nice,12:30,14:00,TER,Daily,30,15
+        R5,Brest,Rennes,07:00,09:00,TER,Daily,30,15
+    """)
+    p = tmp_path / "routes.csv"
+    p.write_text(csv, encoding="utf-8")
+    return str(p)
+
+def _ids(route):
+    return [seg.route_id for seg in route["segments"]]
+
+@pytest.fixture()
+def net(tmp_path: Path) -> RailNetwork:
+    return build_network_from_df(read_raw_csv(_make_csv(tmp_path)))
+
+
+# 1. Reachability, shortest time and fewest transfers, any day or on one weekday
+def test_reachability_table(net: RailNetwork, tmp_path: Path):
+    table = ReachabilityTable.build(net, cache_dir=None, workers=1)
+    assert table.reachable("Paris", "Nice") is True
+    assert table.reachable("Paris", "Rennes") is False
+    assert table.reachable("Nice", "Paris") is False
+    assert table.reachable("Paris", "Atlantis") is None
+    assert table.min_minutes("Paris", "Marseille") == 240
+    assert table.min_transfers("Paris", "Marseille") == 0
+    assert table.min_transfers("Paris", "Marseille", weekday=1) == 1
+    assert table.min_minutes("paris", "NICE") == 360
+    assert table.min_minutes("Lyon", "Paris") is None
+
+# 2. The pool build gives the same tables, which are cached on disk under the timetable hash
+def test_reachability_parallel_and_cache(net: RailNetwork, tmp_path: Path):
+    serial = ReachabilityTable.build(net, cache_dir=None, workers=1)
+    table = ReachabilityTable.build(net, cache_dir=tmp_path, workers=2)
+    assert (table.bits == serial.bits).all()
+    assert table.bits.shape == (8, 6, 1)
+    assert (tmp_path / f"{timetable_hash(net)}.npz").exists()
+    cached = ReachabilityTable.build(net, cache_dir=tmp_path, workers=1)
+    assert (cached.bits == serial.bits).all()
+    assert cached.min_minutes("Paris", "Nice") == 360
+
+# 3. The table of a network is kept and rebuilt once connections are added
+def test_reachability_for_rebuilds(net: RailNetwork, tmp_path: Path):
+    table = reachability_for(net, cache_dir=tmp_path, workers=1)
+    assert reachability_for(net, cache_dir=tmp_path, workers=1) is table
+    assert table.reachable("Brest", "Paris") is False
+    net.add_connection(Connection(
+        route_id="R6",
+        dep_city=net.cities.get_or_create("Rennes"),
+        arr_city=net.cities.get_or_create("Paris"),
+        dep_min=9 * 60 + 30,
+        arr_min=11 * 60,
+        days_mask=ALL_DAYS,
+        first_class_eur=60,
+        second_class_eur=30,
+        train=net.trains.get_or_create("TGV"),
+        trip_minutes=90,
+    ))
+    assert reachability_for(net, cache_dir=tmp_path, workers=1).reachable("Brest", "Paris") is True
+
+# 4. The booking pre-check matches city names like the search: "nice" also matches Venice
+def test_reachable_any_matches_substrings(net: RailNetwork):
+    net.add_connection(Connection(
+        route_id="R7",
+        dep_city=net.cities.get_or_create("Brest"),
+        arr_city=net.cities.get_or_create("Venice"),
+        dep_min=10 * 60,
+        arr_min=20 * 60,
+        days_mask=ALL_DAYS,
+        first_class_eur=200,
+        second_class_eur=100,
+        train=net.trains.get_or_create("TGV"),
+        trip_minutes=600,
+    ))
+    table = ReachabilityTable.build(net, cache_dir=None, workers=1)
+    assert table.reachable("Brest", "Nice") is False
+    assert table.reachable_any("Brest", "nice") is True
+    assert [c.route_id for c in net.search_connections(depart_city="Brest", arrival_city="nice")] == ["R7"]
+    assert table.reachable_any("Rennes", "nice") is False
+    assert table.reachable_any("Brest", "Atlantis") is None
+
+# 5. A table built for the network bounds the indirect route search without changing its results
+def test_reachability_bounds_indirect_search(net: RailNetwork):
+    queries = [("Paris", "Nice", None), ("Paris", "Nice", 0), ("Paris", "Marseille", 1), ("Nice", "Paris", None)]
+    unbounded = [[_ids(r) for r in net.find_indirect_connections(a, b, weekday=d)] for a, b, d in queries]
+    cheapest = [_ids(r) for r in net.iter_indirect_connections("Paris", "Nice")]
+
+    table = reachability_for(net, workers=1)
+    assert table.reaching(net.cities.id_of("Nice")).tolist() == [True, True, True, False, False, False]
+    assert table.reaching(net.cities.id_of("Marseille"), weekday=1).tolist() == [True, True, False, False, False, False]
+    assert [[_ids(r) for r in net.find_indirect_connections(a, b, weekday=d)] for a, b, d in queries] == unbounded
+    assert [_ids(r) for r in net.iter_indirect_connections("Paris", "Nice")] == cheapest == [["R1", "R2", "R4"]]
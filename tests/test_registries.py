@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from EURailNetwork.models import City, Connection, Train
+from EURailNetwork.registries import Cities, RailNetwork, Trains
+
+
+# 1. Entities get dense ids in creation order, with id <-> entity <-> name lookups
+def test_registry_ids():
+    cities = Cities()
+    paris = cities.get_or_create("Paris")
+    lyon = cities.get_or_create("Lyon")
+    assert cities.get_or_create(" PARIS ") is paris
+    assert (paris.id, lyon.id, len(cities)) == (0, 1, 2)
+    assert cities[1] is lyon
+    assert cities.id_of("lyon") == 1
+    assert cities.id_of("Nice") is None
+
+    # per-entity data in an array indexed by id
+    counts = cities.array()
+    np.add.at(counts, [paris.id, lyon.id, paris.id], 1)
+    assert counts.tolist() == [2, 1]
+    assert Trains().array(dtype=np.int32).shape == (0,)
+
+# 2. Cities and trains built by hand are interned when their connection is added
+def test_add_connection_interns_entities():
+    net = RailNetwork()
+    paris = net.cities.get_or_create("Paris")
+    lyon, tgv = City("Lyon"), Train("TGV")
+    net.add_connection(Connection(route_id="R1", dep_city=paris, arr_city=lyon, dep_min=8 * 60, arr_min=10 * 60,
+                                  days_mask=1, first_class_eur=100, second_class_eur=50, train=tgv, trip_minutes=120))
+    assert net.cities.find("lyon") is lyon and lyon.id == 1
+    assert net.trains.find("tgv") is tgv and tgv.id == 0
+    assert [c.route_id for c in net.find_direct("Paris", "Lyon")] == ["R1"]
+
+    # a second Paris cannot take the name of the first one
+    with pytest.raises(ValueError):
+        net.cities.add(City("paris"))
+
+# 3. Cities and trains of another network, or a second hand-built city with a registered name, are resolved to the
+# entities of this network
+def test_add_connection_resolves_entities():
+    net1 = RailNetwork()
+    b, c, tgv = (net1.cities.get_or_create("B"), net1.cities.get_or_create("C"), net1.trains.get_or_create("TGV"))
+    net2 = RailNetwork()
+    net2.cities.get_or_create("A")
+    conn = Connection(route_id="R1", dep_city=b, arr_city=c, dep_min=8 * 60, arr_min=10 * 60, days_mask=1,
+                      first_class_eur=100, second_class_eur=50, train=tgv, trip_minutes=120)
+    net2.add_connection(conn)
+    assert [x.name for x in net2.cities.items] == ["A", "B", "C"]
+    assert conn.dep_city is net2.cities.find("b") and conn.dep_city is not b and conn.dep_city.id == 1
+    assert net2.trains.owns(conn.train) and not net2.trains.owns(tgv)
+    assert (b.id, c.id, tgv.id, b.departures) == (0, 1, 0, [])
+    assert net2.find_direct("B", "C") == [conn]
+    assert net2.search_connections(depart_city="B") == [conn]
+    assert net2.table.column("dep_city").tolist() == [1]
+
+    for n in range(2):
+        net2.add_connection(Connection(route_id=f"P{n}", dep_city=City("Paris"), arr_city=City("Lyon"),
+                                       dep_min=9 * 60, arr_min=11 * 60, days_mask=1, first_class_eur=100,
+                                       second_class_eur=50, train=Train("TGV"), trip_minutes=120))
+    assert [x.name for x in net2.cities.items] == ["A", "B", "C", "Paris", "Lyon"]
+    assert [x.route_id for x in net2.find_direct("paris", "lyon")] == ["P0", "P1"]
+    assert len(net2.trains) == 1
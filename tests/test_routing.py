@@ -0,0 +1,126 @@
+import textwrap
+from pathlib import Path
+from datetime import time
+
+import pytest
+
+from EURailNetwork.loader import read_raw_csv, build_network_from_df
+from EURailNetwork.models import Trip
+from EURailNetwork.registries import RailNetwork
+
+HEADER = "Route ID,Departure City,Arrival City,Departure Time,Arrival Time,Train Type,Days of Operation,First Class ticket rate (in euro),Second Class ticket rate (in euro)"
+
+# Paris -> Lyon -> Marseille -> Nice, plus a faster Monday-only pair of connections
+def _make_csv(tmp_path: Path) -> str:
+    csv = HEADER + "\n" + textwrap.dedent("""\
+        R1,Paris,Lyon,08:00,10:00,TGV,Daily,100,50
+        R2,Lyon,Marseille,10:30,12:00,TGV,Daily,60,30
+        R3,Paris,Dijon,07:00,08:30,TER,Daily,40,20
+        R4,Dijon,Lyon,09:00,10:15,TER,Daily,40,20
+        R6,Marseille,Nice,12:30,14:00,TER,Daily,30,15
+        R7,Paris,Lyon,06:00,07:30,Nightjet,Mon,80,40
+        R8,Lyon,Marseille,08:00,09:30,Nightjet,Mon,80,40
+    """)
+    p = tmp_path / "routes.csv"
+    p.write_text(csv, encoding="utf-8")
+    return str(p)
+
+@pytest.fixture()
+def net(tmp_path: Path) -> RailNetwork:
+    return build_network_from_df(read_raw_csv(_make_csv(tmp_path)))
+
+def _ids(route):
+    return [seg.route_id for seg in route["segments"]]
+
+
+# 1. Earliest arrival with any number of changes, in the find_indirect_connections shape
+def test_earliest_arrival_multi_leg(net: RailNetwork):
+    route = net.earliest_arrival("Paris", "Nice", time(7, 0), weekday=1)
+    assert _ids(route) == ["R1", "R2", "R6"]
+    assert route["wait_times"] == [30, 30]
+    assert route["total_minutes"] == 360
+    assert route["arrival_minutes"] == 14 * 60
+
+# 2. Connections that don't run on the weekday are skipped
+def test_earliest_arrival_weekday(net: RailNetwork):
+    monday = net.earliest_arrival("Paris", "Marseille", time(5, 0), weekday=0)
+    tuesday = net.earliest_arrival("Paris", "Marseille", time(5, 0), weekday=1)
+    assert _ids(monday) == ["R7", "R8"]
+    assert _ids(tuesday) == ["R1", "R2"]
+
+# 3. Too late today: the journey continues with tomorrow's connections (Sunday -> Monday)
+def test_earliest_arrival_next_day(net: RailNetwork):
+    route = net.earliest_arrival("Paris", "Marseille", time(21, 0), weekday=6)
+    assert _ids(route) == ["R7", "R8"]
+    assert route["arrival_minutes"] == 24 * 60 + 9 * 60 + 30
+    assert route["total_minutes"] == 210
+
+# 4. Unreachable destinations
+def test_earliest_arrival_unreachable(net: RailNetwork):
+    assert net.earliest_arrival("Nice", "Paris", time(0, 0), weekday=0) is None
+    assert net.earliest_arrival("Paris", "Atlantis", time(0, 0), weekday=0) is None
+
+# a network of the given rows
+def _layover_net(tmp_path: Path, rows: str) -> RailNetwork:
+    p = tmp_path / "layovers.csv"
+    p.write_text(HEADER + "\n" + textwrap.dedent(rows), encoding="utf-8")
+    return build_network_from_df(read_raw_csv(str(p)))
+
+# A -> B arrives 10:00: B -> C at 10:00 is too short a change, at 15:00 too long a wait, at 10:20 bookable
+LAYOVER_ROWS = """\
+    1,A,B,08:00,10:00,TGV,Daily,50,20
+    2,B,C,10:00,11:00,TGV,Daily,50,20
+    3,B,C,15:00,16:00,TGV,Daily,50,20
+    4,B,C,10:20,12:00,TER,Daily,90,10
+"""
+
+# 5. Every change follows the layover rules of booking, even when breaking them would arrive earlier
+def test_earliest_arrival_layover_rules(tmp_path: Path):
+    net = _layover_net(tmp_path, LAYOVER_ROWS)
+    route = net.earliest_arrival("A", "C", time(7, 0), weekday=0)
+    assert _ids(route) == ["1", "4"]
+    assert route["wait_times"] == [20]
+    assert Trip(connections=route["segments"]).validate_layover()
+
+    net = _layover_net(tmp_path, LAYOVER_ROWS.replace("    4,B,C,10:20,12:00,TER,Daily,90,10\n", ""))
+    assert net.earliest_arrival("A", "C", time(7, 0), weekday=0) is None
+    assert net.find_indirect_connections("A", "C") == []
+
+def _points(routes):
+    return [(_ids(r), r["arrival_minutes"], r["fare"], r["transfers"]) for r in routes]
+
+# 6. Cheaper journeys with more changes stay on the Pareto front next to faster ones
+def test_plan_journeys_front(net: RailNetwork):
+    routes = net.plan_journeys("Paris", "Marseille", time(5, 0), weekday=1)
+    assert _points(routes) == [
+        (["R3", "R4", "R2"], 12 * 60, 70, 2),
+        (["R1", "R2"], 12 * 60, 80, 1),
+    ]
+    assert routes[0]["wait_times"] == [30, 15]
+
+# 7. On Monday the Nightjet legs dominate: R7+R8 is fastest, R7+R2 would be cheaper but waits 3 hours at Lyon
+def test_plan_journeys_weekday_and_dominance(net: RailNetwork):
+    routes = net.plan_journeys("Paris", "Marseille", time(5, 0), weekday=0)
+    assert _points(routes) == [
+        (["R7", "R8"], 9 * 60 + 30, 80, 1),
+        (["R3", "R4", "R2"], 12 * 60, 70, 2),
+    ]
+
+# 8. First class fares and the limit on transfers
+def test_plan_journeys_first_class_and_max_transfers(net: RailNetwork):
+    routes = net.plan_journeys("Paris", "Marseille", time(5, 0), weekday=1, price_class="first", max_transfers=1)
+    assert _points(routes) == [(["R1", "R2"], 12 * 60, 160, 1)]
+    assert net.plan_journeys("Paris", "Nice", time(5, 0), weekday=1, max_transfers=1) == []
+
+# 9. Journeys with a change that breaks the layover rules are never planned, even when they would be faster or
+# cheaper: 2 leaves as 1 arrives, 3 after 5 hours, and at night 6 leaves 40 minutes after 5 arrives
+def test_plan_journeys_layover_rules(tmp_path: Path):
+    net = _layover_net(tmp_path, LAYOVER_ROWS + """\
+    5,A,D,20:00,21:00,TGV,Daily,50,20
+    6,D,C,21:40,22:00,TGV,Daily,50,5
+    7,D,C,21:25,23:00,TGV,Daily,50,15
+""")
+    assert _points(net.plan_journeys("A", "C", time(7, 0), weekday=0)) == [(["1", "4"], 12 * 60, 30, 1)]
+    assert _points(net.plan_journeys("A", "C", time(19, 0), weekday=0, max_days=1)) == [(["5", "7"], 23 * 60, 35, 1)]
+    for route in net.plan_journeys("A", "C", time(0, 0), weekday=0, max_days=1):
+        assert Trip(connections=route["segments"]).validate_layover()
@@ -0,0 +1,29 @@
+import pytest
+
+from EURailNetwork.schema import parse_days, runs_on, common_days, weekdays, format_days, ALL_DAYS
+
+# 1. The three formats of days_of_operation all give the same 7-bit mask layout (bit 0 = Monday)
+def test_parse_days_masks():
+    assert parse_days("Daily") == ALL_DAYS
+    assert parse_days("Mon-Fri") == 0b0011111
+    assert parse_days("Fri-Sun") == 0b1110000
+    assert parse_days("Sat-Mon") == 0b1100001  # wraps around the end of the week
+    assert parse_days("Mon,Wed,Fri") == 0b0010101
+    assert parse_days("Tue|Thu") == 0b0001010
+
+def test_parse_days_empty_raises():
+    with pytest.raises(ValueError):
+        parse_days("  ")
+
+# 2. Membership, intersection and display helpers
+def test_day_mask_helpers():
+    mask = parse_days("Mon,Wed,Fri")
+    assert runs_on(mask, 2) and not runs_on(mask, 1)
+    assert not runs_on(mask, 9)
+    assert weekdays(mask) == [0, 2, 4]
+    assert format_days(mask) == "Monday, Wednesday, Friday"
+
+def test_common_days_of_legs():
+    legs = [parse_days("Mon-Fri"), parse_days("Daily"), parse_days("Fri-Sun")]
+    assert weekdays(common_days(*legs)) == [4]
+    assert common_days(parse_days("Sat-Sun"), parse_days("Mon-Fri")) == 0
@@ -0,0 +1,100 @@
+import textwrap
+from pathlib import Path
+from datetime import time
+
+import pytest
+
+from EURailNetwork.loader import read_raw_csv, build_network_from_df
+from EURailNetwork.models import Connection
+from EURailNetwork.registries import RailNetwork
+
+# Small network where every filter of search_connections removes at least one connection
+def _make_csv(tmp_path: Path) -> str:
+    csv = textwrap.dedent("""\
+        Route ID,Departure City,Arrival City,Departure Time,Arrival Time,Train Type,Days of Operation,First Class ticket rate (in euro),Second Class ticket rate (in euro)
+        R001,Paris,Lyon,08:00,10:00,TGV,Mon|Tue|Wed,100,50
+        R002,Paris,Lyon,09:15,10:30,RegioExpress,Daily,80,40
+        R003,Paris,Lyon,22:30,06:10 (+1d),Nightjet,Daily,70,30
+        R004,Lyon,Paris,11:00,13:00,TGV,Mon|Tue,100,50
+        R005,Paris,Berlin,07:00,13:00,ICE,Mon|Wed|Fri,150,90
+        R006,Paris,Lyon,08:00,09:00,InterCity,Mon|Tue,120,60
+        R007,Lyon,Marseille,10:45,12:30,TGV,Sat-Sun,60,35
+    """)
+    p = tmp_path / "routes.csv"
+    p.write_text(csv, encoding="utf-8")
+    return str(p)
+
+@pytest.fixture()
+def net(tmp_path: Path) -> RailNetwork:
+    return build_network_from_df(read_raw_csv(_make_csv(tmp_path)))
+
+
+# 1. No filters returns every connection, sorted by departure time
+def test_search_no_filters(net: RailNetwork):
+    got = [c.route_id for c in net.search_connections()]
+    assert got == ["R005", "R006", "R001", "R002", "R007", "R004", "R003"]
+
+# 2. City filters are substring and case-insensitive
+def test_search_city_substring(net: RailNetwork):
+    got = [c.route_id for c in net.search_connections(depart_city="LYO")]
+    assert got == ["R007", "R004"]
+
+# 3. Several filters are combined (city + train + price + weekday)
+def test_search_combined_filters(net: RailNetwork):
+    got = net.search_connections(
+        depart_city="paris",
+        train_type="tgv",
+        max_first_class_price=100,
+        weekday=2,
+    )
+    assert [c.route_id for c in got] == ["R001"]
+
+# 4. Time and duration ranges, sorted by duration descending
+def test_search_time_and_duration_ranges(net: RailNetwork):
+    got = net.search_connections(
+        min_departure_time=time(8, 0),
+        max_departure_time=time(11, 0),
+        min_duration=60,
+        max_duration=120,
+        sort_by="trip_minutes",
+        ascending=False,
+    )
+    assert [c.route_id for c in got] == ["R004", "R001", "R007", "R002", "R006"]
+
+# 5. A city that does not exist gives no results
+def test_search_unknown_city(net: RailNetwork):
+    assert net.search_connections(depart_city="Atlantis") == []
+
+# 6. The sorted time indexes pick up connections added after a previous search
+def test_search_time_range_after_add(net: RailNetwork):
+    assert [c.route_id for c in net.search_connections(min_departure_time=time(22, 0))] == ["R003"]
+
+    late = net.connections[0]
+    net.add_connection(Connection(
+        route_id="R008",
+        dep_city=late.arr_city,
+        arr_city=late.dep_city,
+        dep_min=23 * 60,
+        arr_min=23 * 60 + 50,
+        days_mask=late.days_mask,
+        first_class_eur=40,
+        second_class_eur=20,
+        train=late.train,
+        trip_minutes=50,
+    ))
+    got = net.search_connections(min_departure_time=time(22, 0), max_duration=60)
+    assert [c.route_id for c in got] == ["R008"]
+
+# 7. Names are normalized once, the same way everywhere: case, accents and extra spaces don't matter
+def test_search_normalized_names(tmp_path: Path):
+    csv = tmp_path / "accents.csv"
+    csv.write_text(textwrap.dedent("""\
+        Route ID,Departure City,Arrival City,Departure Time,Arrival Time,Train Type,Days of Operation,First Class ticket rate (in euro),Second Class ticket rate (in euro)
+        R1,Zürich,Genève,08:00,10:45,InterCity,Daily,90,50
+        R2,Zurich,Saint  Étienne,12:00,16:00,TGV,Daily,100,60
+    """), encoding="utf-8")
+    net = build_network_from_df(read_raw_csv(str(csv)))
+    assert [c.key for c in net.cities.items] == ["zurich", "geneve", "saint etienne"]
+    assert [c.route_id for c in net.find_direct("ZURICH", "geneve")] == ["R1"]
+    assert [c.route_id for c in net.find_direct(" zürich ", "saint étienne")] == ["R2"]
+    assert [c.route_id for c in net.search_connections(arrival_city="ETIENNE")] == ["R2"]
@@ -1,4 +1,5 @@
 import textwrap
+from dataclasses import replace
 from pathlib import Path
 
 import pytest
@@ -56,6 +57,26 @@ def test_find_direct_no_match_returns_empty(net: RailNetwork):
     assert net.find_direct("Berlin", "Paris") == []
 
 
+# every weekday bucket of a pair holds the connections running that day, in the order they were added
+def test_find_direct_weekday_buckets(net: RailNetwork):
+    for weekday in range(7):
+        expected = [c.route_id for c in net.connections
+                    if c.dep_city.name == "Paris" and c.arr_city.name == "Lyon" and c.days_mask >> weekday & 1]
+        assert [c.route_id for c in net.find_direct("Paris", "Lyon", weekday=weekday)] == expected
+    assert [c.route_id for c in net.find_direct("Paris", "Lyon", weekday=2)] == ["R001", "R002", "R003"]
+    assert [c.route_id for c in net.find_direct("Paris", "Lyon", weekday=6)] == ["R002", "R003"]
+    assert [c.route_id for c in net.find_direct("Lyon", "Paris", weekday=0)] == ["R004"]
+    assert net.find_direct("Lyon", "Paris", weekday=2) == []
+    assert net.find_direct("Paris", "Lyon", weekday=7) == []
+    assert net.find_direct("Paris", "Atlantis", weekday=0) == []
+
+# the buckets are kept up to date by add_connection
+def test_find_direct_weekday_buckets_after_add(net: RailNetwork):
+    net.add_connection(replace(net.connections[3], route_id="R007", id=-1, days_mask=0b1000000))
+    assert [c.route_id for c in net.find_direct("Lyon", "Paris", weekday=6)] == ["R007"]
+    assert [c.route_id for c in net.find_direct("Lyon", "Paris")] == ["R004", "R007"]
+
+
 # Sorting tests
 
 def test_sort_by_duration_ascending(net: RailNetwork):
@@ -86,3 +107,13 @@ def test_sort_ties_break_by_dep_time_then_route_id(net: RailNetwork):
     paris_lyon = net.find_direct("Paris", "Lyon")
     ordered = net.sort_connections(paris_lyon, by="trip_minutes", ascending=True)
     assert ordered[0].route_id == "R006"
+
+# Name sorts compare the lowercased names as written, accents included (InterCity before Intercités)
+def test_sort_by_name_keeps_accents(net: RailNetwork):
+    net.add_connection(replace(net.connections[0], route_id="R007", id=-1, train=net.trains.get_or_create("Intercités")))
+    net.add_connection(replace(net.connections[4], route_id="R008", id=-1, arr_city=net.cities.get_or_create("Brașov")))
+    net.add_connection(replace(net.connections[4], route_id="R009", id=-1, arr_city=net.cities.get_or_create("Bratislava")))
+    by_train = net.search_connections(depart_city="Paris", arrival_city="Lyon", sort_by="train_name")
+    assert [c.train.name for c in by_train][:2] == ["InterCity", "Intercités"]
+    by_city = net.search_connections(depart_city="Paris", sort_by="arr_city")
+    assert [c.arr_city.name for c in by_city][:3] == ["Berlin", "Bratislava", "Brașov"]
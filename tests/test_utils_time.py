@@ -0,0 +1,41 @@
+from datetime import time
+
+import pytest
+
+from EURailNetwork.models import City, Connection, Train
+from EURailNetwork.utils_time import (
+    calculate_wait_time,
+    layover_ok,
+    layover_ok_minutes,
+    parse_minutes_with_offset,
+    trip_minutes,
+    wait_minutes,
+)
+
+
+# 1. Times are parsed to minutes since midnight, with their day offset
+def test_parse_minutes_with_offset():
+    assert parse_minutes_with_offset("08:05") == (485, 0)
+    assert parse_minutes_with_offset("06:10 (+1d)") == (370, 1)
+    with pytest.raises(ValueError):
+        parse_minutes_with_offset("24:00")
+
+# 2. Durations and waits wrap around midnight
+def test_trip_and_wait_minutes():
+    assert trip_minutes(22 * 60 + 30, 6 * 60 + 10, arr_day_offset=1) == 460
+    assert trip_minutes(22 * 60 + 30, 6 * 60 + 10) == 460
+    assert wait_minutes(23 * 60, 5 * 60) == 360
+    assert wait_minutes(23 * 60, 5 * 60) == calculate_wait_time(time(23, 0), time(5, 0))
+
+# 3. The minutes version of the layover rules agrees with the time version
+def test_layover_ok_minutes():
+    for arr in range(0, 24 * 60, 7):
+        for dep in range(0, 24 * 60, 11):
+            assert layover_ok_minutes(arr, dep) == layover_ok(time(*divmod(arr, 60)), time(*divmod(dep, 60)))
+
+# 4. A connection keeps minutes and gives the times back for display
+def test_connection_times():
+    c = Connection(route_id="R1", dep_city=City("Paris"), arr_city=City("Lyon"), dep_min=22 * 60 + 30,
+                   arr_min=6 * 60 + 10, days_mask=1, first_class_eur=70, second_class_eur=30,
+                   train=Train("Nightjet"), trip_minutes=460)
+    assert (c.dep_time, c.arr_time, c.day_offset) == (time(22, 30), time(6, 10), 1)